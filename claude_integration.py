@@ -1,16 +1,100 @@
-import requests
 import pandas as pd
 from datetime import datetime
 import json
+import orjson
 import os
+import re
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit
 from anthropic import Anthropic
 
+# boto3 is optional: it is only needed for Bedrock latency-optimized inference
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+# Retry policy and timeout for Reddit requests
+REQUEST_TIMEOUT = 10  # seconds
+RETRY_POLICY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+
+# Most "more comments" IDs Reddit's /api/morechildren accepts per request
+MORE_CHILDREN_BATCH_SIZE = 100
+
+# Bedrock model used for latency-optimized inference (latency='optimized')
+BEDROCK_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', 'us.anthropic.claude-3-5-haiku-20241022-v1:0')
+
+# Claude models: Haiku for small or simple analyses, Sonnet otherwise
+SONNET_MODEL = "claude-3-sonnet-20240229"
+HAIKU_MODEL = "claude-3-haiku-20240307"
+HAIKU_MAX_PROMPT_TOKENS = 4000
+HAIKU_ANALYSIS_TYPES = {"summary", "themes", "company_info"}
+
+# Batched analysis: output budget per thread, capped at the models' 4096-token
+# output limit, which 8 threads per request fit within
+MAX_OUTPUT_TOKENS = 4096
+BATCH_TOKENS_PER_THREAD = 500
+MAX_BATCH_THREADS = 8
+
+# Analysis prompts by analysis type
+ANALYSIS_PROMPTS = {
+    "sentiment": "Analyze the sentiment of these Reddit comments. Provide a summary of overall sentiment and identify key positive/negative themes.",
+    "summary": "Summarize the main topics and themes discussed in these Reddit comments.",
+    "themes": "Identify the main themes and topics in these Reddit comments. Group similar comments together.",
+    "custom": "Analyze these Reddit comments and provide insights about the discussion."
+}
+
+def _choose_model(prompt_tokens, analysis_type):
+    """
+    Route small prompts and simple analysis types to Haiku
+    """
+    if prompt_tokens < HAIKU_MAX_PROMPT_TOKENS or analysis_type in HAIKU_ANALYSIS_TYPES:
+        return HAIKU_MODEL
+    return SONNET_MODEL
+
+def get_bedrock_client():
+    """
+    Return a Bedrock runtime client for latency-optimized inference, or None if unavailable
+    """
+    if boto3 is None:
+        print("Warning: Bedrock not available (boto3 not installed). Using standard latency.")
+        return None
+    try:
+        return boto3.client('bedrock-runtime')
+    except Exception as e:
+        print(f"Warning: Bedrock not available ({e}). Using standard latency.")
+        return None
+
+def create_message(content, max_tokens, model=SONNET_MODEL, claude_client=None, bedrock_client=None, latency=None):
+    """
+    Send a single-turn prompt to Claude and return the response text
+    
+    Uses Bedrock's Converse API when bedrock_client is given, otherwise claude_client
+    """
+    if bedrock_client:
+        response = bedrock_client.converse(
+            modelId=BEDROCK_MODEL_ID,
+            messages=[{"role": "user", "content": [{"text": content}]}],
+            inferenceConfig={"maxTokens": max_tokens},
+            performanceConfig={"latency": latency}
+        )
+        return response['output']['message']['content'][0]['text']
+    
+    message = claude_client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": content}]
+    )
+    return message.content[0].text
+
 class RedditClaudeAnalyzer:
     """
     Reddit scraper integrated with Claude AI for comment analysis
     """
     
-    def __init__(self, claude_api_key=None):
+    def __init__(self, claude_api_key=None, latency=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -26,10 +110,24 @@ class RedditClaudeAnalyzer:
             else:
                 print("Warning: No Claude API key provided. Set ANTHROPIC_API_KEY environment variable or pass api_key parameter.")
                 self.claude_client = None
+        
+        # Latency-optimized inference is served through Bedrock's Converse API
+        self.latency = latency
+        self.bedrock_client = get_bedrock_client() if latency == 'optimized' else None
+        
+        # One pooled session for the analyzer's lifetime so Reddit connections
+        # (TCP + TLS) stay open between threads
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(max_retries=RETRY_POLICY)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def get_comments_only(self, thread_url, comment_limit=100):
         """
         Extract only comment content from a Reddit thread
+        
+        "More comments" stubs are expanded through /api/morechildren
         """
         print(f"Getting comments from: {thread_url}")
         
@@ -38,20 +136,51 @@ class RedditClaudeAnalyzer:
             json_url = thread_url.rstrip('/') + '.json'
         else:
             json_url = thread_url
+        parts = urlsplit(json_url)
+        more_children_url = f"{parts.scheme}://{parts.netloc}/api/morechildren.json"
         
         params = {'limit': comment_limit} if comment_limit else {}
         
         try:
-            response = requests.get(json_url, headers=self.headers, params=params)
-            response.raise_for_status()
+            data = self._fetch_json(json_url, params)
+            if len(data) < 2:
+                return []
+            link_id = data[0]['data']['children'][0]['data']['name']
             
-            data = response.json()
+            # Extract just the comment text, remembering unexpanded replies
+            more_ids = []
+            seen_ids = set()
+            comments = self.extract_comment_text(data[1]['data']['children'], more_ids, seen_ids)
             
-            # Get comments data (second element in array)
-            comments_data = data[1]['data']['children'] if len(data) > 1 else []
+            # Expand "more" stubs until the limit is reached; each ID is requested
+            # at most once, so this ends even without a limit. Reddit allows only
+            # one morechildren request at a time, so batches are sent in sequence.
+            requested = set()
+            while not comment_limit or len(comments) < comment_limit:
+                pending = [comment_id for comment_id in dict.fromkeys(more_ids) if comment_id not in requested]
+                if not pending:
+                    break
+                more_ids = []
+                batch_size = MORE_CHILDREN_BATCH_SIZE
+                if comment_limit:
+                    batch_size = min(batch_size, comment_limit - len(comments))
+                batch = pending[:batch_size]
+                requested.update(batch)
+                more_ids.extend(pending[batch_size:])
+                try:
+                    result = self._fetch_json(more_children_url, {
+                        'api_type': 'json',
+                        'link_id': link_id,
+                        'children': ','.join(batch)
+                    })
+                except Exception as e:
+                    print(f"Error expanding more comments: {e}")
+                    continue
+                things = result.get('json', {}).get('data', {}).get('things', [])
+                comments.extend(self.extract_comment_text(things, more_ids, seen_ids))
             
-            # Extract just the comment text
-            comments = self.extract_comment_text(comments_data)
+            if comment_limit:
+                comments = comments[:comment_limit]
             
             print(f"Retrieved {len(comments)} comments")
             return comments
@@ -60,18 +189,43 @@ class RedditClaudeAnalyzer:
             print(f"Error: {e}")
             return []
     
-    def extract_comment_text(self, comments_data):
+    def _fetch_json(self, url, params):
+        """
+        Fetch a Reddit JSON endpoint and return the decoded response
+        """
+        response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    def extract_comment_text(self, comments_data, more_ids=None, seen_ids=None):
         """
         Recursively extract comment text from nested structure
+        
+        If more_ids is given, the IDs of unexpanded "more" replies are appended to it.
+        If seen_ids is given, comments whose ID is already in it are skipped and
+        new IDs are added to it.
         """
         comment_texts = []
         for comment_item in comments_data:
-            # Skip "more" objects and deleted comments
+            # Collect "more" objects for later expansion
+            if comment_item.get('kind') == 'more':
+                if more_ids is not None:
+                    more_ids.extend(comment_item.get('data', {}).get('children', []))
+                continue
+            
+            # Skip anything else that isn't a comment
             if comment_item.get('kind') != 't1':
                 continue
                 
             comment_data = comment_item.get('data', {})
             
+            # Skip comments already extracted from another listing
+            if seen_ids is not None:
+                comment_id = comment_data.get('id')
+                if comment_id in seen_ids:
+                    continue
+                seen_ids.add(comment_id)
+            
             # Get comment text
             body = comment_data.get('body', '').strip()
             
@@ -82,11 +236,17 @@ class RedditClaudeAnalyzer:
             # Get nested replies
             replies = comment_data.get('replies')
             if replies and isinstance(replies, dict):
-                nested_comments = self.extract_comment_text(replies['data']['children'])
+                nested_comments = self.extract_comment_text(replies['data']['children'], more_ids, seen_ids)
                 comment_texts.extend(nested_comments)
         
         return comment_texts
     
+    def _create_message(self, content, max_tokens, model=SONNET_MODEL):
+        """
+        Send a single-turn prompt to Claude and return the response text
+        """
+        return create_message(content, max_tokens, model, self.claude_client, self.bedrock_client, self.latency)
+    
     def analyze_comments_with_claude(self, comments, analysis_type="sentiment"):
         """
         Analyze comments using Claude AI
@@ -98,36 +258,81 @@ class RedditClaudeAnalyzer:
         Returns:
             Analysis results from Claude
         """
-        if not self.claude_client:
+        if not self.claude_client and not self.bedrock_client:
             return "Claude API not available. Please set ANTHROPIC_API_KEY environment variable."
         
         # Prepare comments text (limit to avoid token limits)
         comments_text = "\n\n".join(comments[:50])  # Limit to first 50 comments
         
-        # Define analysis prompts
-        prompts = {
-            "sentiment": "Analyze the sentiment of these Reddit comments. Provide a summary of overall sentiment and identify key positive/negative themes.",
-            "summary": "Summarize the main topics and themes discussed in these Reddit comments.",
-            "themes": "Identify the main themes and topics in these Reddit comments. Group similar comments together.",
-            "custom": "Analyze these Reddit comments and provide insights about the discussion."
-        }
+        prompt = ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["custom"])
+        
+        try:
+            content = f"{prompt}\n\nComments:\n{comments_text}"
+            # Rough token estimate: ~4 characters per token
+            model = _choose_model(len(content) // 4, analysis_type)
+            return self._create_message(content, max_tokens=1000, model=model)
+            
+        except Exception as e:
+            return f"Error analyzing with Claude: {e}"
+    
+    def analyze_comments_batch(self, comment_lists, analysis_type="sentiment"):
+        """
+        Analyze several threads' comments, sending up to MAX_BATCH_THREADS threads per Claude request
+        
+        Args:
+            comment_lists: List of comment lists, one per thread
+            analysis_type: Type of analysis ("sentiment", "summary", "themes", "custom")
+        
+        Returns:
+            List of analysis results, one per thread. Falls back to one request
+            per thread for any batch whose response can't be parsed.
+        """
+        if not self.claude_client and not self.bedrock_client:
+            return ["Claude API not available. Please set ANTHROPIC_API_KEY environment variable."] * len(comment_lists)
+        
+        analyses = []
+        for start in range(0, len(comment_lists), MAX_BATCH_THREADS):
+            analyses.extend(self._analyze_batch(comment_lists[start:start + MAX_BATCH_THREADS], analysis_type))
+        return analyses
+    
+    def _analyze_batch(self, comment_lists, analysis_type):
+        """
+        Analyze up to MAX_BATCH_THREADS threads' comments with a single Claude request
+        """
+        if len(comment_lists) <= 1:
+            return [self.analyze_comments_with_claude(comments, analysis_type) for comments in comment_lists]
         
-        prompt = prompts.get(analysis_type, prompts["custom"])
+        prompt = ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["custom"])
+        
+        # One block per thread (limit each to 50 comments, as for single threads)
+        blocks = "\n".join(
+            f"---BLOCK {i}---\n" + "\n\n".join(comments[:50])
+            for i, comments in enumerate(comment_lists, 1)
+        )
         
         try:
-            message = self.claude_client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1000,
-                messages=[{
-                    "role": "user",
-                    "content": f"{prompt}\n\nComments:\n{comments_text}"
-                }]
+            content = (
+                f"Analyze each BLOCK of Reddit comments separately. {prompt}\n\n"
+                f"Respond with only a JSON array of {len(comment_lists)} strings, "
+                f"one analysis per BLOCK in order.\n\n{blocks}"
+            )
+            response_text = self._create_message(
+                content,
+                max_tokens=min(MAX_OUTPUT_TOKENS, len(comment_lists) * BATCH_TOKENS_PER_THREAD),
+                model=_choose_model(len(content) // 4, analysis_type)
             )
             
-            return message.content[0].text
+            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
+            analyses = json.loads(json_match.group()) if json_match else None
+            if isinstance(analyses, list) and len(analyses) == len(comment_lists):
+                return [str(analysis) for analysis in analyses]
+            
+            print("Batched analysis response didn't match the blocks, analyzing threads one at a time...")
             
         except Exception as e:
-            return f"Error analyzing with Claude: {e}"
+            print(f"Batched analysis failed ({e}), analyzing threads one at a time...")
+        
+        return [self.analyze_comments_with_claude(comments, analysis_type) for comments in comment_lists]
     
     def save_comments_and_analysis(self, comments, analysis, filename="reddit_analysis.csv"):
         """
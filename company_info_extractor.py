@@ -6,8 +6,53 @@ Simple function to extract company name, executive names, and top products from
 import yfinance as yf
 import requests
 import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
+# Common executive patterns in business summaries
+_CEO_PATTERNS = [
+    re.compile(r'CEO[:\s]+([A-Z][a-z]+ [A-Z][a-z]+)'),
+    re.compile(r'Chief Executive Officer[:\s]+([A-Z][a-z]+ [A-Z][a-z]+)'),
+    re.compile(r'led by ([A-Z][a-z]+ [A-Z][a-z]+)'),
+]
+
+# Common product/service patterns in business summaries, combined so the
+# summary is scanned once
+_PRODUCT_RE = re.compile(
+    r'(?:products?|services?|offers?|develops?|manufactures?)[:\s]+([^.]{10,100})',
+    re.IGNORECASE
+)
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Per-process cache of yfinance info: ticker -> (fetch time, info)
+_INFO_CACHE = {}
+_INFO_CACHE_TTL = 3600  # seconds
+_INFO_CACHE_MAXSIZE = 1000
+_INFO_CACHE_LOCK = threading.Lock()
+
+def _fetch_info(ticker: str) -> Dict[str, any]:
+    """
+    Return yfinance Ticker.info, cached per process for _INFO_CACHE_TTL seconds
+    """
+    now = time.monotonic()
+    with _INFO_CACHE_LOCK:
+        cached = _INFO_CACHE.get(ticker)
+        if cached and now - cached[0] < _INFO_CACHE_TTL:
+            return cached[1]
+    
+    info = yf.Ticker(ticker).info
+    
+    with _INFO_CACHE_LOCK:
+        if ticker not in _INFO_CACHE and len(_INFO_CACHE) >= _INFO_CACHE_MAXSIZE:
+            # Evict the oldest entry
+            del _INFO_CACHE[min(_INFO_CACHE, key=lambda t: _INFO_CACHE[t][0])]
+        _INFO_CACHE[ticker] = (now, info)
+    return info
+
 def get_company_key_info(ticker: str) -> Dict[str, any]:
     """
     Extract company name, executive names, and top product names from stock ticker
@@ -34,8 +79,7 @@ def get_company_key_info(ticker: str) -> Dict[str, any]:
         print(f"Fetching data for {ticker}...")
         
         # Get stock info using yfinance
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = _fetch_info(ticker)
         
         # Extract company name
         company_name = info.get('longName') or info.get('shortName') or info.get('name')
@@ -68,17 +112,10 @@ def get_company_key_info(ticker: str) -> Dict[str, any]:
             business_summary = info.get('longBusinessSummary', '')
             if business_summary:
                 # Look for common executive patterns in the summary
-                import re
-                ceo_patterns = [
-                    r'CEO[:\s]+([A-Z][a-z]+ [A-Z][a-z]+)',
-                    r'Chief Executive Officer[:\s]+([A-Z][a-z]+ [A-Z][a-z]+)',
-                    r'led by ([A-Z][a-z]+ [A-Z][a-z]+)',
-                ]
-                
-                for pattern in ceo_patterns:
-                    matches = re.findall(pattern, business_summary)
-                    if matches:
-                        executives.append(f"{matches[0]} - CEO")
+                for pattern in _CEO_PATTERNS:
+                    match = pattern.search(business_summary)
+                    if match:
+                        executives.append(f"{match.group(1)} - CEO")
                         break
         
         result['executives'] = executives
@@ -90,28 +127,13 @@ def get_company_key_info(ticker: str) -> Dict[str, any]:
         business_summary = info.get('longBusinessSummary', '')
         if business_summary:
             # Look for product mentions in business summary
-            import re
-            
-            # Common product/service patterns
-            product_patterns = [
-                r'products?[:\s]+([^.]{10,100})',
-                r'services?[:\s]+([^.]{10,100})',
-                r'offers?[:\s]+([^.]{10,100})',
-                r'develops?[:\s]+([^.]{10,100})',
-                r'manufactures?[:\s]+([^.]{10,100})',
-            ]
-            
-            for pattern in product_patterns:
-                matches = re.findall(pattern, business_summary, re.IGNORECASE)
-                for match in matches:
-                    # Clean up the match
-                    clean_match = match.strip().split('.')[0].strip()
-                    if len(clean_match) > 10 and clean_match not in products:
-                        products.append(clean_match)
-                        if len(products) >= 5:  # Limit to top 5
-                            break
-                if len(products) >= 5:
-                    break
+            for match in _PRODUCT_RE.finditer(business_summary):
+                # Clean up the match
+                clean_match = match.group(1).strip().split('.')[0].strip()
+                if len(clean_match) > 10 and clean_match not in products:
+                    products.append(clean_match)
+                    if len(products) >= 5:  # Limit to top 5
+                        break
         
         # If no products found, try to extract from industry/sector
         if not products:
@@ -139,13 +161,29 @@ def get_company_key_info(ticker: str) -> Dict[str, any]:
     
     return result
 
-def get_company_key_info_with_claude(ticker: str, claude_api_key: str = None) -> Dict[str, any]:
+def get_company_key_info_many(tickers: List[str], max_workers: int = 10) -> List[Dict[str, any]]:
+    """
+    Run get_company_key_info for several tickers concurrently
+    
+    Args:
+        tickers (List[str]): Stock ticker symbols
+        max_workers (int): Maximum number of concurrent Yahoo Finance requests
+        
+    Returns:
+        List of get_company_key_info dicts, in the same order as tickers (see
+        simple_company_info.get_company_info_many for flat, daily-cached lists)
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(get_company_key_info, tickers))
+
+def get_company_key_info_with_claude(ticker: str, claude_api_key: str = None, latency: str = None) -> Dict[str, any]:
     """
     Enhanced version using Claude AI for better executive and product information
     
     Args:
         ticker (str): Stock ticker symbol
         claude_api_key (str): Claude API key (optional)
+        latency (str): 'optimized' to use Bedrock latency-optimized inference (optional)
         
     Returns:
         Dict with enhanced company information
@@ -154,21 +192,20 @@ def get_company_key_info_with_claude(ticker: str, claude_api_key: str = None) ->
     # First get basic info
     result = get_company_key_info(ticker)
     
-    if not claude_api_key:
+    if not claude_api_key and latency != 'optimized':
         return result
     
     try:
-        # Use Claude to enhance the information
-        import os
-        if not claude_api_key:
-            claude_api_key = os.getenv('ANTHROPIC_API_KEY')
+        # Imported here so the plain yfinance helpers don't need the Claude dependencies
+        from anthropic import Anthropic
+        from claude_integration import _choose_model, create_message, get_bedrock_client
         
-        if not claude_api_key:
+        # Latency-optimized inference is served through Bedrock's Converse API
+        bedrock_client = get_bedrock_client() if latency == 'optimized' else None
+        claude_client = Anthropic(api_key=claude_api_key) if claude_api_key else None
+        if not bedrock_client and not claude_client:
             return result
         
-        from anthropic import Anthropic
-        client = Anthropic(api_key=claude_api_key)
-        
         company_name = result['company_name'] or ticker
         
         prompt = f"""
@@ -184,18 +221,19 @@ def get_company_key_info_with_claude(ticker: str, claude_api_key: str = None) ->
         }}
         """
         
-        response = client.messages.create(
-            model="claude-3-sonnet-20240229",
+        # A short JSON list of executives and products doesn't need Sonnet
+        claude_text = create_message(
+            prompt,
             max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
+            model=_choose_model(len(prompt) // 4, "company_info"),
+            claude_client=claude_client,
+            bedrock_client=bedrock_client,
+            latency=latency
         )
         
-        claude_text = response.content[0].text
-        
         # Try to parse JSON response
         try:
-            import re
-            json_match = re.search(r'\{.*\}', claude_text, re.DOTALL)
+            json_match = _JSON_OBJECT_RE.search(claude_text)
             if json_match:
                 claude_data = json.loads(json_match.group())
                 result['executives'] = claude_data.get('executives', result['executives'])
@@ -217,12 +255,12 @@ if __name__ == "__main__":
     print("Company Information Extractor")
     print("=" * 50)
     
-    for ticker in test_tickers:
+    results = get_company_key_info_many(test_tickers)
+    
+    for ticker, info in zip(test_tickers, results):
         print(f"\n📊 {ticker}:")
         print("-" * 30)
         
-        info = get_company_key_info(ticker)
-        
         print(f"Company: {info['company_name']}")
         print(f"Executives: {info['executives']}")
         print(f"Products: {info['products']}")
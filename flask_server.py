@@ -1,10 +1,12 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
 from flask_cors import CORS
 import pandas as pd
-import json
+import orjson
 import re
-from collections import defaultdict
 import os
+import hashlib
+import zlib
+from functools import lru_cache
 
 app = Flask(__name__)
 CORS(app)
@@ -12,81 +14,199 @@ CORS(app)
 # Path to the CSV file
 CSV_PATH = os.path.join(os.path.dirname(__file__), 'back-end', 'combined_sentiment.csv')
 
+# Bump when build_mentions changes so stale Parquet caches are rebuilt
+MENTIONS_CACHE_VERSION = 2
+
+# Rows per chunk when streaming the CSV without pyarrow
+CSV_CHUNK_SIZE = 50_000
+
+# Common stock symbol patterns (2-5 uppercase letters)
+_SYMBOL_RE = re.compile(r'\b[A-Z]{2,5}\b')
+
+# Uppercase words that look like stock symbols but aren't
+_COMMON_WORDS = frozenset({
+    'THE', 'AND', 'FOR', 'ARE', 'BUT', 'NOT', 'YOU', 'ALL', 'CAN', 'HAD', 'HER', 'WAS', 'ONE', 'OUR', 'OUT',
+    'DAY', 'GET', 'HAS', 'HIM', 'HIS', 'HOW', 'ITS', 'MAY', 'NEW', 'NOW', 'OLD', 'SEE', 'TWO', 'WAY', 'WHO',
+    'BOY', 'DID', 'LET', 'PUT', 'SAY', 'SHE', 'TOO', 'USE'
+})
+
+# Company names for known stock symbols
+_COMPANY_NAMES = {
+    'AAPL': 'Apple Inc.',
+    'TSLA': 'Tesla, Inc.',
+    'NVDA': 'NVIDIA Corporation',
+    'MSFT': 'Microsoft Corporation',
+    'GOOGL': 'Alphabet Inc.',
+    'AMZN': 'Amazon.com, Inc.',
+    'META': 'Meta Platforms, Inc.',
+    'NFLX': 'Netflix, Inc.',
+    'AMD': 'Advanced Micro Devices, Inc.',
+    'CRM': 'Salesforce, Inc.',
+    'ORCL': 'Oracle Corporation',
+    'GLD': 'SPDR Gold Trust',
+    'IAU': 'iShares Gold Trust',
+    'ONDS': 'Ondas Holdings Inc.',
+    'OPEN': 'Opendoor Technologies Inc.',
+    'FNMA': 'Federal National Mortgage Association',
+    'PENGU': 'Penguin International Limited',
+    'CULT': 'Cult Collective Inc.',
+    'MULTI': 'Multi Commodity Exchange of India Ltd',
+    'BABA': 'Alibaba Group Holding Limited',
+    'SFTBY': 'SoftBank Group Corp.',
+    'SPX': 'S&P 500',
+    'COMP': 'NASDAQ Composite',
+    'DJI': 'Dow Jones Industrial Average',
+    'HSI': 'Hang Seng Index',
+    'N225': 'Nikkei 225',
+    'KOSPI': 'KOSPI Index',
+    'ASX200': 'S&P/ASX 200',
+    'SSNLF': 'Samsung Electronics Co., Ltd.',
+    'STLA': 'Stellantis N.V.',
+    'STOXX': 'STOXX Europe 600',
+    'DAX': 'DAX Index',
+    'FTSE': 'FTSE 100',
+    'ASML': 'ASML Holding N.V.',
+    'MU': 'Micron Technology, Inc.',
+    'WBD': 'Warner Bros. Discovery, Inc.',
+    'LYV': 'Live Nation Entertainment, Inc.',
+    'WDC': 'Western Digital Corporation',
+    'US10Y': '10-Year Treasury Note',
+    'DJIA': 'Dow Jones Industrial Average'
+}
+
+def parse_tickers_json(value):
+    """Parse a tickers JSON cell into a dict, treating blanks and bad JSON as empty"""
+    if pd.isna(value):
+        return {}
+    try:
+        tickers_json = orjson.loads(value)
+    except (TypeError, ValueError):
+        return {}
+    return tickers_json if isinstance(tickers_json, dict) else {}
+
+def build_mentions(df):
+    """Normalize raw CSV rows into one (symbol, score, summary) row per stock mention"""
+    df = df.copy()
+    df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0.0)
+    df['summary'] = df['summary'].fillna('')
+    
+    # Explode the tickers JSON into one (row, symbol, data) entry per ticker
+    tickers_json = df['tickers'].map(parse_tickers_json)
+    ticker_pairs = tickers_json.map(lambda t: list(t.items())).explode().dropna()
+    ticker_rows = pd.DataFrame(ticker_pairs.tolist(), index=ticker_pairs.index, columns=['symbol', 'data'])
+    ticker_rows = ticker_rows[ticker_rows['data'].map(lambda d: isinstance(d, dict) and 'score' in d).astype(bool)]
+    ticker_mentions = pd.DataFrame({
+        'row': ticker_rows.index,
+        'symbol': ticker_rows['symbol'].values,
+        'score': ticker_rows['data'].map(lambda d: d['score']).astype(float).values,
+        'summary': ticker_rows['data'].map(lambda d: d.get('explanation', '')).fillna('').values
+    })
+    
+    # If a row has no tickers, symbols found in its summary count as
+    # mentions with the row-level score
+    no_tickers = tickers_json.map(len) == 0
+    summary_symbols = df['summary'][no_tickers].map(extract_symbols_from_text).explode().dropna()
+    summary_mentions = pd.DataFrame({
+        'row': summary_symbols.index,
+        'symbol': summary_symbols.values,
+        'score': df['score'].loc[summary_symbols.index].values,
+        'summary': df['summary'].loc[summary_symbols.index].values
+    })
+    
+    # Keep CSV row order (ticker mentions before summary mentions) so
+    # summaries are combined and ties are ranked in first-seen order
+    mentions = pd.concat([ticker_mentions, summary_mentions], ignore_index=True)
+    return mentions.sort_values('row', kind='stable').drop(columns='row')
+
+def read_mentions_csv(csv_path):
+    """Stream the CSV in chunks, normalizing each chunk into mentions as it is read"""
+    columns = ['tickers', 'score', 'summary']
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        # Pin column types: Arrow otherwise infers them from the first block and
+        # fails on later blocks (e.g. integer scores followed by 0.5)
+        column_types = {'tickers': pa.string(), 'score': pa.float64(), 'summary': pa.string()}
+        reader = pa_csv.open_csv(
+            csv_path,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types=column_types)
+        )
+        # Keep columns Arrow-backed instead of converting strings to Python objects
+        chunks = (batch.to_pandas(types_mapper=pd.ArrowDtype) for batch in reader)
+        string_dtype = 'string[pyarrow]'
+    except ImportError:
+        chunks = pd.read_csv(csv_path, usecols=columns, chunksize=CSV_CHUNK_SIZE)
+        string_dtype = object
+    
+    chunk_mentions = [build_mentions(chunk) for chunk in chunks]
+    if chunk_mentions:
+        mentions = pd.concat(chunk_mentions, ignore_index=True)
+    else:
+        mentions = pd.DataFrame({'symbol': [], 'score': [], 'summary': []})
+    mentions['symbol'] = pd.Categorical(mentions['symbol'].astype(str))
+    mentions['score'] = mentions['score'].astype(float)
+    mentions['summary'] = mentions['summary'].astype(string_dtype)
+    return mentions
+
+def _load_cached(csv_path):
+    """Load normalized mentions from a Parquet cache, rebuilding it when the CSV is newer"""
+    parquet_path = f"{os.path.splitext(csv_path)[0]}.mentions-v{MENTIONS_CACHE_VERSION}.parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        try:
+            return pd.read_parquet(parquet_path)
+        except Exception as e:
+            print(f"Ignoring unreadable Parquet cache: {e}")
+    
+    mentions = read_mentions_csv(csv_path)
+    try:
+        # Write to a temporary file first so concurrent workers never read a partial cache
+        tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+        mentions.to_parquet(tmp_path, compression='zstd', index=False)
+        os.replace(tmp_path, parquet_path)
+    except Exception as e:
+        # Parquet support (pyarrow) is optional; fall back to parsing the CSV each load
+        print(f"Could not write Parquet cache: {e}")
+    return mentions
+
 def load_and_process_csv():
     """Load and process the CSV data to extract stock information"""
     try:
-        # Read the CSV file
-        df = pd.read_csv(CSV_PATH)
+        mentions = _load_cached(CSV_PATH)
+        if mentions.empty:
+            return []
         
-        # Dictionary to store aggregated stock data
-        stock_data = defaultdict(lambda: {
-            'symbol': '',
-            'companyName': '',
-            'sentimentScores': [],
-            'summaries': [],
-            'mentions': 0,
-            'currentPrice': 0.0,  # Placeholder - would need real price data
-            'priceChange': 0.0,   # Placeholder
-            'priceChangePercent': 0.0  # Placeholder
-        })
+        # Aggregate per symbol
+        grouped = mentions.groupby('symbol', sort=False, observed=True)
+        stocks = grouped.agg(avgSentiment=('score', 'mean'), mentions=('score', 'size'))
+        stocks['combinedSummary'] = (
+            mentions[mentions['summary'] != '']
+            .groupby('symbol', sort=False, observed=True)['summary']
+            .agg(' '.join)
+            .reindex(stocks.index, fill_value='')
+        )
+        
+        # Convert sentiment score from -1 to 1 range to 0-100 range
+        stocks['sentimentScore'] = ((stocks['avgSentiment'] + 1) * 50).clip(0, 100).round(1)
         
-        # Process each row
-        for _, row in df.iterrows():
-            # Parse the tickers JSON
-            try:
-                tickers_json = json.loads(row['tickers']) if pd.notna(row['tickers']) else {}
-            except:
-                tickers_json = {}
-            
-            # Extract sentiment score and summary
-            sentiment_score = float(row['score']) if pd.notna(row['score']) else 0.0
-            summary = row['summary'] if pd.notna(row['summary']) else ''
-            
-            # Process each ticker in the row
-            for ticker, data in tickers_json.items():
-                if isinstance(data, dict) and 'score' in data:
-                    stock_data[ticker]['symbol'] = ticker
-                    stock_data[ticker]['companyName'] = get_company_name(ticker)
-                    stock_data[ticker]['sentimentScores'].append(data['score'])
-                    stock_data[ticker]['summaries'].append(data.get('explanation', ''))
-                    stock_data[ticker]['mentions'] += 1
-            else:
-                # If no tickers found, try to extract from summary or other fields
-                # Look for common stock symbols in the summary
-                symbols_in_summary = extract_symbols_from_text(summary)
-                for symbol in symbols_in_summary:
-                    stock_data[symbol]['symbol'] = symbol
-                    stock_data[symbol]['companyName'] = get_company_name(symbol)
-                    stock_data[symbol]['sentimentScores'].append(sentiment_score)
-                    stock_data[symbol]['summaries'].append(summary)
-                    stock_data[symbol]['mentions'] += 1
+        # Sort by sentiment score (highest first) and keep the top 10
+        top_stocks = stocks.sort_values('sentimentScore', ascending=False, kind='stable').head(10)
         
-        # Convert to list and calculate averages
         stocks_list = []
-        for symbol, data in stock_data.items():
-            if data['mentions'] > 0:  # Only include stocks that were mentioned
-                avg_sentiment = sum(data['sentimentScores']) / len(data['sentimentScores'])
-                # Convert sentiment score from -1 to 1 range to 0-100 range
-                sentiment_score_0_100 = max(0, min(100, (avg_sentiment + 1) * 50))
-                
-                # Combine all summaries
-                combined_summary = ' '.join([s for s in data['summaries'] if s])
-                
-                stock_info = {
-                    'symbol': symbol,
-                    'companyName': data['companyName'],
-                    'currentPrice': get_mock_price(symbol),  # Mock price data
-                    'priceChange': get_mock_price_change(symbol),
-                    'priceChangePercent': get_mock_price_change_percent(symbol),
-                    'sentimentScore': round(sentiment_score_0_100, 1),
-                    'sentimentSummary': combined_summary[:200] + '...' if len(combined_summary) > 200 else combined_summary,
-                    'mentions': data['mentions']
-                }
-                stocks_list.append(stock_info)
+        for symbol, data in zip(top_stocks.index, top_stocks.itertuples(index=False)):
+            combined_summary = data.combinedSummary
+            stocks_list.append({
+                'symbol': symbol,
+                'companyName': get_company_name(symbol),
+                'currentPrice': get_mock_price(symbol),  # Mock price data
+                'priceChange': get_mock_price_change(symbol),
+                'priceChangePercent': get_mock_price_change_percent(symbol),
+                'sentimentScore': float(data.sentimentScore),
+                'sentimentSummary': combined_summary[:200] + '...' if len(combined_summary) > 200 else combined_summary,
+                'mentions': int(data.mentions)
+            })
         
-        # Sort by sentiment score (highest first) and return top 10
-        stocks_list.sort(key=lambda x: x['sentimentScore'], reverse=True)
-        return stocks_list[:10]
+        return stocks_list
         
     except Exception as e:
         print(f"Error processing CSV: {e}")
@@ -97,131 +217,112 @@ def extract_symbols_from_text(text):
     if not text:
         return []
     
-    # Common stock symbol patterns (2-5 uppercase letters)
-    pattern = r'\b[A-Z]{2,5}\b'
-    symbols = re.findall(pattern, text)
-    
-    # Filter out common words that aren't stock symbols
-    common_words = {'THE', 'AND', 'FOR', 'ARE', 'BUT', 'NOT', 'YOU', 'ALL', 'CAN', 'HAD', 'HER', 'WAS', 'ONE', 'OUR', 'OUT', 'DAY', 'GET', 'HAS', 'HIM', 'HIS', 'HOW', 'ITS', 'MAY', 'NEW', 'NOW', 'OLD', 'SEE', 'TWO', 'WAY', 'WHO', 'BOY', 'DID', 'ITS', 'LET', 'PUT', 'SAY', 'SHE', 'TOO', 'USE'}
-    
-    return [s for s in symbols if s not in common_words and len(s) >= 2]
+    # Filter out common words that aren't stock symbols; each symbol is
+    # returned once, in order of first appearance
+    symbols = (m.group() for m in _SYMBOL_RE.finditer(text))
+    return list(dict.fromkeys(s for s in symbols if s not in _COMMON_WORDS))
 
 def get_company_name(symbol):
     """Get company name for a stock symbol"""
-    company_names = {
-        'AAPL': 'Apple Inc.',
-        'TSLA': 'Tesla, Inc.',
-        'NVDA': 'NVIDIA Corporation',
-        'MSFT': 'Microsoft Corporation',
-        'GOOGL': 'Alphabet Inc.',
-        'AMZN': 'Amazon.com, Inc.',
-        'META': 'Meta Platforms, Inc.',
-        'NFLX': 'Netflix, Inc.',
-        'AMD': 'Advanced Micro Devices, Inc.',
-        'CRM': 'Salesforce, Inc.',
-        'ORCL': 'Oracle Corporation',
-        'GLD': 'SPDR Gold Trust',
-        'IAU': 'iShares Gold Trust',
-        'ONDS': 'Ondas Holdings Inc.',
-        'OPEN': 'Opendoor Technologies Inc.',
-        'FNMA': 'Federal National Mortgage Association',
-        'PENGU': 'Penguin International Limited',
-        'CULT': 'Cult Collective Inc.',
-        'MULTI': 'Multi Commodity Exchange of India Ltd',
-        'BABA': 'Alibaba Group Holding Limited',
-        'SFTBY': 'SoftBank Group Corp.',
-        'SPX': 'S&P 500 Index',
-        'COMP': 'NASDAQ Composite',
-        'DJI': 'Dow Jones Industrial Average',
-        'HSI': 'Hang Seng Index',
-        'N225': 'Nikkei 225',
-        'KOSPI': 'KOSPI Index',
-        'ASX200': 'S&P/ASX 200',
-        'SSNLF': 'Samsung Electronics Co., Ltd.',
-        'STLA': 'Stellantis N.V.',
-        'STOXX': 'STOXX Europe 600',
-        'DAX': 'DAX Index',
-        'FTSE': 'FTSE 100',
-        'ASML': 'ASML Holding N.V.',
-        'TSLA': 'Tesla, Inc.',
-        'MU': 'Micron Technology, Inc.',
-        'WBD': 'Warner Bros. Discovery, Inc.',
-        'LYV': 'Live Nation Entertainment, Inc.',
-        'WDC': 'Western Digital Corporation',
-        'US10Y': '10-Year Treasury Note',
-        'SPX': 'S&P 500',
-        'COMP': 'NASDAQ Composite',
-        'DJIA': 'Dow Jones Industrial Average'
-    }
-    return company_names.get(symbol, f'{symbol} Corporation')
+    return _COMPANY_NAMES.get(symbol, f'{symbol} Corporation')
+
+@lru_cache(maxsize=4096)
+def _mock_triplet(symbol):
+    """Derive (price, change, change percent) mock values from a CRC32 of the symbol"""
+    hash_val = zlib.crc32(symbol.encode())
+    return (
+        round(50 + (hash_val % 500), 2),
+        round((hash_val >> 8) % 20 - 10, 2),
+        round((hash_val >> 16) % 10 - 5, 2)
+    )
 
 def get_mock_price(symbol):
     """Generate mock price data for demonstration"""
     # Simple hash-based price generation for consistency
-    import hashlib
-    hash_val = int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16)
-    return round(50 + (hash_val % 500), 2)
+    return _mock_triplet(symbol)[0]
 
 def get_mock_price_change(symbol):
     """Generate mock price change data"""
-    import hashlib
-    hash_val = int(hashlib.md5((symbol + 'change').encode()).hexdigest()[:8], 16)
-    return round((hash_val % 20) - 10, 2)
+    return _mock_triplet(symbol)[1]
 
 def get_mock_price_change_percent(symbol):
     """Generate mock price change percentage"""
-    import hashlib
-    hash_val = int(hashlib.md5((symbol + 'percent').encode()).hexdigest()[:8], 16)
-    return round((hash_val % 10) - 5, 2)
+    return _mock_triplet(symbol)[2]
 
-# Global variable to cache the processed data
+def json_response(payload, status=200):
+    """Build a JSON response from a dict or already-serialized JSON bytes"""
+    if not isinstance(payload, bytes):
+        payload = orjson.dumps(payload)
+    return Response(payload, status=status, mimetype='application/json')
+
+# Global variables to cache the processed data and its serialized responses
 cached_stocks_data = None
+_cached_json_stocks = None
+_cached_etag_stocks = None
+_cached_index = {}
+
+def set_cached_stocks(stocks):
+    """Cache processed stocks and pre-serialize the responses served from them"""
+    global cached_stocks_data, _cached_json_stocks, _cached_etag_stocks, _cached_index
+    timestamp = pd.Timestamp.now().isoformat()
+    
+    cached_stocks_data = stocks
+    _cached_json_stocks = orjson.dumps({
+        'success': True,
+        'data': stocks,
+        'timestamp': timestamp
+    })
+    # Hash only the stock data so the ETag is stable across refreshes and workers
+    _cached_etag_stocks = hashlib.sha1(orjson.dumps(stocks)).hexdigest()
+    _cached_index = {
+        stock['symbol']: orjson.dumps({
+            'success': True,
+            'data': stock,
+            'timestamp': timestamp
+        })
+        for stock in stocks
+    }
+
+def ensure_cached_stocks():
+    """Process the CSV on first use"""
+    if cached_stocks_data is None:
+        set_cached_stocks(load_and_process_csv())
 
 @app.route('/api/stocks', methods=['GET'])
 def get_stocks():
     """Get all stocks with sentiment data"""
-    global cached_stocks_data
-    
-    # Use cached data if available, otherwise process CSV
-    if cached_stocks_data is None:
-        cached_stocks_data = load_and_process_csv()
+    ensure_cached_stocks()
     
-    return jsonify({
-        'success': True,
-        'data': cached_stocks_data,
-        'timestamp': pd.Timestamp.now().isoformat()
-    })
+    # Data only changes on refresh, so let clients and proxies revalidate by ETag
+    if request.if_none_match.contains(_cached_etag_stocks):
+        response = Response(status=304)
+    else:
+        response = json_response(_cached_json_stocks)
+    response.set_etag(_cached_etag_stocks)
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 @app.route('/api/stocks/<symbol>', methods=['GET'])
 def get_stock(symbol):
     """Get specific stock data by symbol"""
-    global cached_stocks_data
-    
-    if cached_stocks_data is None:
-        cached_stocks_data = load_and_process_csv()
+    ensure_cached_stocks()
     
-    symbol = symbol.upper()
-    stock = next((s for s in cached_stocks_data if s['symbol'] == symbol), None)
+    stock_json = _cached_index.get(symbol.upper())
     
-    if not stock:
-        return jsonify({
+    if stock_json is None:
+        return json_response({
             'success': False,
             'message': 'Stock not found'
-        }), 404
+        }, status=404)
     
-    return jsonify({
-        'success': True,
-        'data': stock,
-        'timestamp': pd.Timestamp.now().isoformat()
-    })
+    return json_response(stock_json)
 
 @app.route('/api/refresh', methods=['POST'])
 def refresh_data():
     """Refresh the cached data by reprocessing the CSV"""
-    global cached_stocks_data
-    cached_stocks_data = load_and_process_csv()
+    set_cached_stocks(load_and_process_csv())
     
-    return jsonify({
+    return json_response({
         'success': True,
         'message': 'Data refreshed successfully',
         'timestamp': pd.Timestamp.now().isoformat()
@@ -230,17 +331,20 @@ def refresh_data():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         'status': 'healthy',
         'timestamp': pd.Timestamp.now().isoformat()
     })
 
-if __name__ == '__main__':
-    print("🚀 Starting Flask server for MoodRing Markets...")
+def create_app():
+    """Pre-load the stock data and return the app (used as the gunicorn entry point)"""
     print(f"📊 Loading data from: {CSV_PATH}")
-    
-    # Pre-load the data
-    cached_stocks_data = load_and_process_csv()
+    set_cached_stocks(load_and_process_csv())
     print(f"✅ Loaded {len(cached_stocks_data)} stocks")
+    return app
+
+if __name__ == '__main__':
+    print("🚀 Starting Flask server for MoodRing Markets...")
     
-    app.run(debug=True, host='0.0.0.0', port=5002)
+    # Development server only; use gunicorn for production (see FLASK_SETUP.md)
+    create_app().run(host='0.0.0.0', port=5002)
@@ -1,16 +1,99 @@
-import requests
+import asyncio
+import aiohttp
 import csv
+from collections import deque
 import json
-import time
-from datetime import datetime
-import pandas as pd
+import orjson
+from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 import re
-import yfinance as yf
+import time
+from simple_company_info import get_company_info_many
+
+# Concurrency caps shared by all Reddit requests in a run
+MAX_CONCURRENT_REQUESTS = 64
+MAX_REQUESTS_PER_HOST = 8
+
+# Transient server errors are retried with exponential backoff
+RETRY_STATUSES = {502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled on each retry
+
+# Columns written for each subreddit post
+POST_FIELDS = ['title', 'author', 'score', 'upvote_ratio', 'num_comments', 'created_utc', 'url', 'permalink',
+               'selftext', 'flair', 'is_video', 'over_18', 'gilded', 'domain', 'post_id']
+CSV_BUFFER_SIZE = 1 << 20
+# created_utc is written as a naive UTC timestamp
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+# Pause all Reddit requests until the rate-limit window resets once fewer calls than this remain
+RATE_LIMIT_MIN_REMAINING = 2
+
+class RateLimiter:
+    """
+    Throttle shared by all coroutines hitting one host, driven by the
+    X-Ratelimit-Remaining / X-Ratelimit-Reset headers on each response
+    """
+    def __init__(self, min_remaining=RATE_LIMIT_MIN_REMAINING):
+        self.min_remaining = min_remaining
+        self.lock = asyncio.Lock()
+        self.resume_at = 0.0
+    
+    async def wait(self):
+        """
+        Sleep until the current rate-limit window has reset, if it is exhausted
+        """
+        async with self.lock:
+            delay = self.resume_at - time.monotonic()
+            if delay > 0:
+                print(f"Rate limit nearly used up. Waiting {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
+    
+    def update(self, headers):
+        """
+        Record the remaining budget reported by a response
+        """
+        try:
+            remaining = float(headers.get('X-Ratelimit-Remaining', 100))
+            reset = float(headers.get('X-Ratelimit-Reset', 0))
+        except ValueError:
+            return
+        if remaining < self.min_remaining:
+            self.resume_at = max(self.resume_at, time.monotonic() + reset)
+
+reddit_rate_limiter = RateLimiter()
 
-def scrape_reddit_json_to_csv(subreddit, limit):
+def create_session():
+    """
+    Create the aiohttp session shared by all requests in a scrape run
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS, limit_per_host=MAX_REQUESTS_PER_HOST)
+    )
+
+async def get_json(session, url, headers=None, params=None):
+    """
+    GET a JSON document, retrying transient server and connection errors
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        await reddit_rate_limiter.wait()
+        try:
+            async with session.get(url, headers=headers, params=params) as response:
+                reddit_rate_limiter.update(response.headers)
+                if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    response.raise_for_status()
+                    return orjson.loads(await response.read())
+        except aiohttp.ClientConnectionError:
+            if attempt == MAX_RETRIES:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def scrape_reddit_json_to_csv(session, subreddit, limit):
     """
     Scrape a given subreddit using JSON API and save to CSV
+    
+    Returns:
+        List of (title, url, selftext) tuples, or None if nothing was found
     """
     output_file = f"reddit_{subreddit}.csv"
     url = f"https://www.reddit.com/r/{subreddit}.json"
@@ -26,49 +109,46 @@ def scrape_reddit_json_to_csv(subreddit, limit):
     
     try:
         print(f"Fetching data from r/{subreddit}...")
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await get_json(session, url, headers, params)
         posts = data['data']['children']
-        
-        # Prepare data for CSV
-        csv_data = []
-        
-        for post in posts:
-            post_data = post['data']
-            
-            csv_row = {
-                'title': post_data.get('title', ''),
-                'author': post_data.get('author', ''),
-                'score': post_data.get('score', 0),
-                'upvote_ratio': post_data.get('upvote_ratio', 0),
-                'num_comments': post_data.get('num_comments', 0),
-                'created_utc': datetime.fromtimestamp(post_data.get('created_utc', 0)).strftime('%Y-%m-%d %H:%M:%S'),
-                'url': post_data.get('url', ''),
-                'permalink': f"https://www.reddit.com{post_data.get('permalink', '')}",
-                'selftext': post_data.get('selftext', '')[:500],  # Limit text length
-                'flair': post_data.get('link_flair_text', ''),
-                'is_video': post_data.get('is_video', False),
-                'over_18': post_data.get('over_18', False),
-                'gilded': post_data.get('gilded', 0),
-                'domain': post_data.get('domain', ''),
-                'post_id': post_data.get('id', '')
-            }
-            
-            csv_data.append(csv_row)
-        
-        # Write to CSV
-        if csv_data:
-            df = pd.DataFrame(csv_data)
-            df.to_csv(output_file, index=False, encoding='utf-8')
-            print(f"Successfully saved {len(csv_data)} posts to {output_file}")
-            return df
-        else:
+        if not posts:
             print("No data found")
             return None
+        
+        # Stream rows straight to the CSV, keeping only what topic searches need
+        topic_rows = []
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(POST_FIELDS)
+            for post in posts:
+                post_data = post['data']
+                title = post_data.get('title', '')
+                post_url = post_data.get('url', '')
+                selftext = post_data.get('selftext', '')[:500]  # Limit text length
+                
+                writer.writerow((
+                    title,
+                    post_data.get('author', ''),
+                    post_data.get('score', 0),
+                    post_data.get('upvote_ratio', 0),
+                    post_data.get('num_comments', 0),
+                    (UNIX_EPOCH + timedelta(seconds=post_data.get('created_utc', 0) or 0)).isoformat(sep=' ', timespec='seconds'),
+                    post_url,
+                    f"https://www.reddit.com{post_data.get('permalink', '')}",
+                    selftext,
+                    post_data.get('link_flair_text', ''),
+                    post_data.get('is_video', False),
+                    post_data.get('over_18', False),
+                    post_data.get('gilded', 0),
+                    post_data.get('domain', ''),
+                    post_data.get('id', '')
+                ))
+                topic_rows.append((title or '', post_url, selftext or ''))
+        
+        print(f"Successfully saved {len(topic_rows)} posts to {output_file}")
+        return topic_rows
             
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         print(f"Request error: {e}")
         return None
     except json.JSONDecodeError as e:
@@ -88,11 +168,12 @@ class RedditCommentsScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
     
-    def get_comments_only(self, thread_url, delay, comment_limit=100):
+    async def get_comments_only(self, session, thread_url, delay, comment_limit=100):
         """
         Extract only comment content from a Reddit thread
         
         Args:
+            session: Shared aiohttp session
             thread_url: Reddit thread URL
             comment_limit: Max number of comments to get
             
@@ -110,21 +191,18 @@ class RedditCommentsScraper:
         params = {'limit': comment_limit} if comment_limit else {}
         
         try:
-            response = requests.get(json_url, headers=self.headers, params=params)
-    
-            # Check for rate limiting before raising other HTTP errors
-            if response.status_code == 429:
-                retry_after = int(response.headers.get('Retry-After', delay))
+            try:
+                data = await get_json(session, json_url, self.headers, params)
+            except aiohttp.ClientResponseError as e:
+                # Check for rate limiting before giving up on other HTTP errors
+                if e.status != 429:
+                    raise
+                retry_after = int((e.headers or {}).get('Retry-After', delay))
                 print(f"Rate limited. Waiting {retry_after} seconds...")
-                time.sleep(retry_after)
+                await asyncio.sleep(retry_after)
                 
                 # Retry the request after waiting
-                response = requests.get(json_url, headers=self.headers, params=params)
-            
-            # Now check for other HTTP errors
-            response.raise_for_status()
-            
-            data = response.json()
+                data = await get_json(session, json_url, self.headers, params)
             
             # Get comments data (second element in array)
             comments_data = data[1]['data']['children'] if len(data) > 1 else []
@@ -142,156 +220,102 @@ class RedditCommentsScraper:
     
     def extract_comment_text(self, comments_data):
         """
-        Recursively extract comment text from nested structure
+        Extract comment text from nested structure, walking the reply tree iteratively
         """
         comment_texts = []
-        for comment_item in comments_data:
+        # Replies go back on the front of the queue so comments keep their thread order
+        queue = deque(comments_data)
+        while queue:
+            comment_item = queue.popleft()
             # Skip "more" objects and deleted comments
             if comment_item.get('kind') != 't1':
                 continue
                 
-            comment_data = comment_item.get('data', {}).replace('\n', ' ').replace('\r', ' ')
+            comment_data = comment_item.get('data', {})
             
-            # Get comment text
-            body = comment_data.get('body', '').strip()
+            # Get comment text on a single line
+            body = ' '.join(comment_data.get('body', '').split())
             
             # Skip deleted/removed comments
-            if body and body not in ['[deleted]', '[removed]', '']:
+            if body and body not in ('[deleted]', '[removed]'):
                 comment_texts.append(body)
             
             # Get nested replies
             replies = comment_data.get('replies')
             if replies and isinstance(replies, dict):
-                nested_comments = self.extract_comment_text(replies['data']['children'])
-                comment_texts.extend(nested_comments)
+                queue.extendleft(reversed(replies['data']['children']))
         
         return comment_texts
 
 #insert 
-def scrape_topic_reddit(words, path, ticker):
-    df_url = []
-    with open(path, 'r', encoding='utf-8') as file:
-            # Create CSV reader
-            csv_reader = csv.reader(file)
-            
-            # Get header row
-            headers = next(csv_reader)
-            # Access each row
-            for row_num, row in enumerate(csv_reader, 1):
-                for word in words:
-                    if word in row[0] or word in row[8]:
-                        df_url.append(row[6])
-#    print(df_url)
-    comments = []
-    for url in df_url:
-        scraper = RedditCommentsScraper()
-        comments = scraper.get_comments_only(url,30)
+async def scrape_topic_reddit(session, words, posts, writer):
+    # Match all keywords in one regex pass over each post's title and text
+    words = [word for word in words if word]
+    if not words:
+        return []
+    pattern = re.compile('|'.join(re.escape(word) for word in words))
+    
+    df_url = [
+        url for title, url, selftext in posts
+        if pattern.search(title) or pattern.search(selftext)
+    ]
     
-    # Save comments to CSV
+    # Fetch every matching thread's comments concurrently
+    scraper = RedditCommentsScraper()
+    results = await asyncio.gather(*[scraper.get_comments_only(session, url, 30) for url in df_url])
+    comments = []
+    for thread_comments in results:
+        comments.extend(thread_comments)
+        # Append to the ticker's comments CSV as we go
+        writer.writerows([comment] for comment in thread_comments)
+    return comments
+
+SUBREDDITS = ['StockMarket','Bogleheads','popculturechat','investing','stocks','personalfinance','wallstreetbets','pennystocks','SecurityAnalysis','BusinessOfMedia','Economics']
+TICKERS = ['NVDA', 'ORCL', 'AMZN', 'AAPL', 'MSFT', 'TSLA']
+
+async def scrape_ticker(session, ticker, info, listings):
+    """
+    Search already-scraped subreddit listings for one ticker and save its comments
+    """
+    comments = []
+    # One comments file per ticker, covering every subreddit
+    output_file = f"reddit_comments_{ticker}.csv"
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(['content'])
+        for posts in listings:
+            comments += await scrape_topic_reddit(session, info, posts, writer)
     if comments:
-        df = pd.DataFrame({'content': comments})
-        df.to_csv(f"reddit_comments_{ticker}.csv", index=False)
-        print(f"Saved {len(comments)} comments to reddit_comments_{ticker}.csv")
+        print(f"Saved {len(comments)} comments to {output_file}")
     else:
         print("No comments to save")
+    print(f"\n{len(comments)} discussions found about {ticker}!\n)")
     return comments
 
-def get_company_info(ticker: str) -> list[str]:
+async def reddit_scrape_all(session, tickers, limit):
     """
-    Get company name, executive names, and top products from stock ticker
+    Scrape each subreddit listing once, then search it for every ticker
+    
+    Returns:
+        Dict of ticker -> list of comment strings
     """
+    # Subreddit listings and company info are independent, so fetch them all at once
+    infos, *listings = await asyncio.gather(
+        asyncio.to_thread(get_company_info_many, tickers),
+        *[scrape_reddit_json_to_csv(session, subreddit, limit) for subreddit in SUBREDDITS]
+    )
+    listings = [posts for posts in listings if posts is not None]
     
-    try:        
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Company name - clean up "Ltd.", "Inc.", etc.
-        company_name = info.get('longName') or info.get('shortName') or f"Company {ticker}"
-        # Remove common suffixes
-        suffixes_to_remove = [' Ltd.', ' Inc.', ' Corp.', ' Corporation', ' Co.', ' Company', ' LLC', ' L.P.', ' LP']
-        for suffix in suffixes_to_remove:
-            if company_name.endswith(suffix):
-                company_name = company_name[:-len(suffix)]
-                break
-        
-        # Extract executives
-        executives = []
-        if 'companyOfficers' in info and info['companyOfficers']:
-            for officer in info['companyOfficers'][:5]:  # Top 5
-                if isinstance(officer, dict):
-                    name = officer.get('name', '')
-                    if name:
-                        # Remove common prefixes like "Mr.", "Ms.", "Dr.", etc.
-                        prefixes_to_remove = ['Mr. ', 'Ms. ', 'Dr. ', 'Mrs. ', 'Prof. ']
-                        for prefix in prefixes_to_remove:
-                            if name.startswith(prefix):
-                                name = name[len(prefix):]
-                                break
-                        
-                        # Remove middle names/initials - keep only first and last name
-                        name_parts = name.split()
-                        if len(name_parts) >= 2:
-                            # Keep first and last name only
-                            clean_name = f"{name_parts[0]} {name_parts[-1]}"
-                        else:
-                            clean_name = name
-                        
-                        executives.append(clean_name)
-        
-        # Extract products from business summary
-        products = []
-        business_summary = info.get('longBusinessSummary', '')
-        
-        if business_summary:
-            # Clean up the business summary and extract key products
-            summary = business_summary.replace('\n', ' ').replace('\r', ' ')
-            
-            # Look for specific product mentions
-            product_keywords = [
-                'iPhone', 'iPad', 'Mac', 'Apple Watch', 'AirPods',  # Apple
-                'Windows', 'Office', 'Azure', 'Xbox', 'Teams',      # Microsoft
-                'Android', 'Chrome', 'Gmail', 'YouTube', 'Search',  # Google
-                'Model S', 'Model 3', 'Model X', 'Model Y', 'Cybertruck',  # Tesla
-                'GPU', 'GeForce', 'Quadro', 'Tesla', 'Jetson',     # NVIDIA
-                'Facebook', 'Instagram', 'WhatsApp', 'Quest VR'  #Meta
-
-
-            ]
-            
-            found_products = []
-            for keyword in product_keywords:
-                if keyword.lower() in summary.lower():
-                    found_products.append(keyword)
-            
-            # If we found specific products, use them
-            if found_products:
-                products = found_products[:5]
-                
-        if not products:
-            products = []
-        
-        # Merge everything into one single list
-        result = [company_name] + executives[:5] + products[:5]
-        
-        return result
-        
-    except Exception as e:
-        return [f"Company {ticker}", "Information not available", "Information not available"]
+    # Tickers only share the read-only listings, so they run concurrently too
+    results = await asyncio.gather(*[scrape_ticker(session, ticker, infos[ticker], listings) for ticker in tickers])
+    return dict(zip(tickers, results))
 
+async def reddit_scrape(session, ticker, limit):
+    return (await reddit_scrape_all(session, [ticker], limit))[ticker]
 
-def reddit_scrape(ticker,limit):
-    info = get_company_info(ticker)
-    subreddits = ['StockMarket','Bogleheads','popculturechat','investing','stocks','personalfinance','wallstreetbets','pennystocks','SecurityAnalysis','BusinessOfMedia','Economics']
-    comments = []
-    for subreddit in subreddits:
-        path = scrape_reddit_json_to_csv(subreddit, limit)
-        comments += scrape_topic_reddit(info,f"reddit_{subreddit}.csv",ticker)
-    print(f"\n{len(comments)} discussions found about {ticker}!\n)")
-    return comments
+async def main():
+    async with create_session() as session:
+        await reddit_scrape_all(session, TICKERS, 100)
 
-comments = reddit_scrape('NVDA',100)
-comments = reddit_scrape('ORCL',100)
-comments = reddit_scrape('AMZN',100)
-comments = reddit_scrape('AAPL',100)
-comments = reddit_scrape('MSFT',100)
-comments = reddit_scrape('TSLA',100)
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,32 @@
 #!/usr/bin/env python3
 import sys
 import csv
-import time
 import re
 import argparse
+import asyncio
+import hashlib
 from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+from selectolax.lexbor import LexborHTMLParser
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
 }
 
+# Concurrency caps: total open connections, and per site so no host is hammered
+MAX_CONCURRENT_REQUESTS = 64
+MAX_REQUESTS_PER_HOST = 8
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=20)
+
+# Transient server errors are retried with exponential backoff
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled on each retry
+
+CSV_BUFFER_SIZE = 1 << 20
+
 # Default sites (you can also pass --sites-file with one URL per line)
 SITES = [
     "https://www.marketwatch.com/",
@@ -92,14 +105,33 @@ EXTRACTORS = {
 }
 
 ARTICLE_PATTERNS = re.compile(r"/(news|article|articles|markets|story|stories)/", re.I)
+_WS_RE = re.compile(r"\s+")
+_WWW_RE = re.compile(r"^www\.")
+
+# Meta tags holding a publish date, as (property selector, name selector) pairs
+_META_DATE_SELECTORS = tuple(
+    (f'meta[property="{name}"]', f'meta[name="{name}"]')
+    for name in ["article:published_time", "og:updated_time", "date", "pubdate"]
+)
+
+
+def extractor_for(url):
+    host = _WWW_RE.sub("", urlparse(url).netloc)
+    # Exact host first, then parent domains (e.g. uk.reuters.com -> reuters.com)
+    while host:
+        conf = EXTRACTORS.get(host)
+        if conf:
+            return conf
+        host = host.partition(".")[2]
+    return None
 
 
-def parse_date(soup, selectors):
+def parse_date(tree, selectors):
     # try common selectors/meta
     for sel in selectors or []:
-        node = soup.select_one(sel)
+        node = tree.css_first(sel)
         if node:
-            val = node.get("datetime") or node.get_text(" ", strip=True)
+            val = node.attributes.get("datetime") or node.text(separator=" ", strip=True)
             if val:
                 try:
                     # attempt ISO or flexible parse
@@ -107,10 +139,10 @@ def parse_date(soup, selectors):
                 except Exception:
                     pass
     # meta tags
-    for name in ["article:published_time", "og:updated_time", "date", "pubdate"]:
-        m = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name})
-        if m and m.get("content"):
-            val = m["content"]
+    for property_sel, name_sel in _META_DATE_SELECTORS:
+        m = tree.css_first(property_sel) or tree.css_first(name_sel)
+        if m and m.attributes.get("content"):
+            val = m.attributes["content"]
             try:
                 return datetime.fromisoformat(val.replace("Z", "+00:00")).astimezone().replace(tzinfo=None)
             except Exception:
@@ -118,98 +150,114 @@ def parse_date(soup, selectors):
     return None
 
 
-def get_text(soup, selectors):
+def get_text(tree, selectors):
     for sel in selectors:
-        node = soup.select_one(sel)
+        node = tree.css_first(sel)
         if node:
-            text = re.sub(r"\s+", " ", node.get_text(strip=True))
+            text = _WS_RE.sub(" ", node.text(strip=True))
             if text:
                 return text
     return ""
 
 
-def extract_links(base_url, soup, selectors, max_per_site):
-    urls = []
+def extract_links(base_url, tree, selectors, max_per_site, article_only=False):
+    # dict keys keep first-seen order while dropping duplicates
+    out = {}
     for sel in selectors:
-        for a in soup.select(sel):
-            href = a.get("href")
+        for a in tree.css(sel):
+            href = a.attributes.get("href")
             if not href:
                 continue
             full = urljoin(base_url, href)
             if not full.startswith("http"):
                 continue
-            path = urlparse(full).path
-            if ARTICLE_PATTERNS.search(path):
-                urls.append(full)
-            else:
-                urls.append(full)
-            if len(urls) >= max_per_site * 2:
-                break
-        if len(urls) >= max_per_site * 2:
-            break
-    seen = set()
-    out = []
-    for u in urls:
-        if u not in seen:
-            out.append(u)
-            seen.add(u)
-        if len(out) >= max_per_site:
-            break
-    return out
-
-
-def fetch(url):
-    r = requests.get(url, headers=HEADERS, timeout=20)
-    r.raise_for_status()
-    return r.text
-
-
-def scrape_article(url, cutoff):
-    html = fetch(url)
-    soup = BeautifulSoup(html, "html.parser")
-    host = re.sub(r"^www\.", "", urlparse(url).netloc)
-    conf = None
-    for k in EXTRACTORS:
-        if k in host:
-            conf = EXTRACTORS[k]
-            break
+            if article_only and not ARTICLE_PATTERNS.search(urlparse(full).path):
+                continue
+            out[full] = None
+            if len(out) >= max_per_site:
+                return list(out)
+    return list(out)
+
+
+async def fetch(session, url):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with session.get(url, timeout=REQUEST_TIMEOUT) as r:
+                if r.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    r.raise_for_status()
+                    return await r.text()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+async def scrape_article(session, url, cutoff):
+    html = await fetch(session, url)
+    tree = LexborHTMLParser(html)
+    conf = extractor_for(url)
     # date filter
-    dt = parse_date(soup, (conf or {}).get("date"))
+    dt = parse_date(tree, (conf or {}).get("date"))
     if cutoff and dt and dt < cutoff:
         return None, None, dt
-    headline = get_text(soup, (conf or {}).get("headline", ["h1", "title"]))
-    body = get_text(soup, (conf or {}).get("article", ["article", "main", "body"]))
+    headline = get_text(tree, (conf or {}).get("headline", ["h1", "title"]))
+    body = get_text(tree, (conf or {}).get("article", ["article", "main", "body"]))
     return headline, body, dt
 
 
-def scrape_sites(sites, max_per_site, since_days):
-    rows = []
+def body_digest(body):
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=16).digest()
+
+
+async def scrape_site(session, site, max_per_site, cutoff, writer, seen):
+    # Rows are written as each article finishes so a crash keeps what was already scraped
+    # seen is shared across sites: {"urls": set of links, "bodies": set of body digests}
+    count = 0
+    try:
+        html = await fetch(session, site)
+        tree = LexborHTMLParser(html)
+        conf = extractor_for(site)
+        # Site link selectors already target articles; filter by URL only for the generic fallback
+        link_sels = (conf or {}).get("links")
+        links = extract_links(site, tree, link_sels or ["a"], max_per_site, article_only=not link_sels)
+        # Another index page may already have queued the same article
+        links = [link for link in links if link not in seen["urls"]]
+        seen["urls"].update(links)
+
+        async def scrape_link(link):
+            return link, await scrape_article(session, link, cutoff)
+
+        # Fetch all articles at once; the connector's per-host limit keeps this polite
+        for next_done in asyncio.as_completed([scrape_link(link) for link in links]):
+            try:
+                link, (h, b, dt) = await next_done
+            except Exception:
+                continue
+            if b:
+                # Syndicated wire stories reappear under different URLs
+                digest = body_digest(b)
+                if digest in seen["bodies"]:
+                    continue
+                seen["bodies"].add(digest)
+            if h or b:
+                writer.writerow((link, h, b, dt.isoformat() if dt else ""))
+                count += 1
+    except Exception:
+        pass
+    return count
+
+
+async def scrape_sites(sites, max_per_site, since_days, writer):
     cutoff = None
     if since_days is not None:
         cutoff = datetime.now() - timedelta(days=since_days)
-    for site in sites:
-        try:
-            html = fetch(site)
-            soup = BeautifulSoup(html, "html.parser")
-            host = re.sub(r"^www\.", "", urlparse(site).netloc)
-            conf = None
-            for k in EXTRACTORS:
-                if k in host:
-                    conf = EXTRACTORS[k]
-                    break
-            link_sels = (conf or {}).get("links", ["a"])
-            links = extract_links(site, soup, link_sels, max_per_site)
-            for link in links:
-                try:
-                    h, b, dt = scrape_article(link, cutoff)
-                    if h or b:
-                        rows.append((link, h, b, dt.isoformat() if dt else ""))
-                        time.sleep(0.5)
-                except Exception:
-                    continue
-        except Exception:
-            continue
-    return rows
+    seen = {"urls": set(), "bodies": set()}
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS, limit_per_host=MAX_REQUESTS_PER_HOST)
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector) as session:
+        site_counts = await asyncio.gather(
+            *(scrape_site(session, site, max_per_site, cutoff, writer, seen) for site in sites)
+        )
+    return sum(site_counts)
 
 
 def main():
@@ -228,12 +276,11 @@ def main():
         except Exception:
             pass
 
-    rows = scrape_sites(sites, args.max_per_site, args.since_days)
-    with open(args.out_csv, "w", newline="", encoding="utf-8") as f:
+    with open(args.out_csv, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
         w = csv.writer(f)
         w.writerow(["url", "headline", "text", "published_iso"])
-        w.writerows(rows)
-    print(f"Wrote {len(rows)} rows to {args.out_csv}")
+        count = asyncio.run(scrape_sites(sites, args.max_per_site, args.since_days, w))
+    print(f"Wrote {count} rows to {args.out_csv}")
 
 
 if __name__ == "__main__":
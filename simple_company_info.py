@@ -6,96 +6,181 @@ Returns a clean dictionary with the exact information you need
 
 import yfinance as yf
 import re
-from typing import Dict, List
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional
 
-def get_company_info(ticker: str) -> List[str]:
+# Cleaned results are cached per ticker per day, in memory and in a shelve file so
+# reruns skip yfinance (unlike company_info_extractor's per-process TTL cache of raw info)
+_SHELVE_PATH = '.yf_cache'
+_DAILY_RESULTS: Dict[str, List[str]] = {}
+_SHELVE_LOCK = threading.Lock()
+
+# Corporate suffixes stripped from company names, and honorifics stripped from executive names
+_SUFFIX_RE = re.compile(r'\s+(?:Ltd\.|Inc\.|Corp\.|Corporation|Co\.|Company|LLC|L\.P\.|LP)$')
+_PREFIX_RE = re.compile(r'^(?:Mr\.|Ms\.|Dr\.|Mrs\.|Prof\.)\s+')
+
+# Specific product mentions to look for in the business summary
+PRODUCT_KEYWORDS = (
+    'iPhone', 'iPad', 'Mac', 'Apple Watch', 'AirPods',  # Apple
+    'Windows', 'Office', 'Azure', 'Xbox', 'Teams',      # Microsoft
+    'Android', 'Chrome', 'Gmail', 'YouTube', 'Search',  # Google
+    'Model S', 'Model 3', 'Model X', 'Model Y', 'Cybertruck',  # Tesla
+    'GPU', 'GeForce', 'Quadro', 'Tesla', 'Jetson',     # NVIDIA
+    'Facebook', 'Instagram', 'WhatsApp', 'Quest VR'  #Meta
+)
+_NL_RE = re.compile(r'[\n\r]')
+# One pass over the summary finds every keyword; the lookahead lets overlapping mentions all match
+_PRODUCT_RE = re.compile('(?=(' + '|'.join(map(re.escape, PRODUCT_KEYWORDS)) + '))', re.IGNORECASE)
+
+def get_company_info(ticker: str, info: Dict = None) -> List[str]:
     """
     Get company name, executive names, and top products from stock ticker
     Returns a single list with: [company_name, executive1, executive2, ..., product1, product2, ...]
     
     Args:
         ticker (str): Stock ticker symbol (e.g., 'AAPL', 'MSFT', 'GOOGL')
+        info (Dict): Already-fetched yfinance info for the ticker, used on a cache miss
+            instead of fetching it (optional)
         
     Returns:
         List[str]: Single list containing company name, executives, and products
     """
+    key = _daily_key(ticker)
+    cached = _read_daily_result(key)
+    if cached is not None:
+        return cached
     
-    try:        
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Company name - clean up "Ltd.", "Inc.", etc.
-        company_name = info.get('longName') or info.get('shortName') or f"Company {ticker}"
-        # Remove common suffixes
-        suffixes_to_remove = [' Ltd.', ' Inc.', ' Corp.', ' Corporation', ' Co.', ' Company', ' LLC', ' L.P.', ' LP']
-        for suffix in suffixes_to_remove:
-            if company_name.endswith(suffix):
-                company_name = company_name[:-len(suffix)]
-                break
-        
-        # Extract executives
-        executives = []
-        if 'companyOfficers' in info and info['companyOfficers']:
-            for officer in info['companyOfficers'][:5]:  # Top 5
-                if isinstance(officer, dict):
-                    name = officer.get('name', '')
-                    if name:
-                        # Remove common prefixes like "Mr.", "Ms.", "Dr.", etc.
-                        prefixes_to_remove = ['Mr. ', 'Ms. ', 'Dr. ', 'Mrs. ', 'Prof. ']
-                        for prefix in prefixes_to_remove:
-                            if name.startswith(prefix):
-                                name = name[len(prefix):]
-                                break
-                        
-                        # Remove middle names/initials - keep only first and last name
-                        name_parts = name.split()
-                        if len(name_parts) >= 2:
-                            # Keep first and last name only
-                            clean_name = f"{name_parts[0]} {name_parts[-1]}"
-                        else:
-                            clean_name = name
-                        
-                        executives.append(clean_name)
-        
-        # Extract products from business summary
-        products = []
-        business_summary = info.get('longBusinessSummary', '')
+    try:
+        result = _lookup_company_info(ticker, info)
+    except Exception as e:
+        return _unavailable(ticker)
+    
+    with _SHELVE_LOCK:
+        _DAILY_RESULTS[key] = result
+        try:
+            with shelve.open(_SHELVE_PATH) as disk:
+                disk[key] = result
+        except Exception as e:
+            print(f"Could not write company info cache: {e}")
+    return list(result)
+
+def get_company_info_many(tickers: List[str], max_workers: int = 6) -> Dict[str, List[str]]:
+    """
+    Run get_company_info for several tickers, prefetching uncached yfinance info concurrently
+    
+    Args:
+        tickers (List[str]): Stock ticker symbols
+        max_workers (int): Maximum number of concurrent Yahoo Finance requests
         
-        if business_summary:
-            # Clean up the business summary and extract key products
-            summary = business_summary.replace('\n', ' ').replace('\r', ' ')
-            
-            # Look for specific product mentions
-            product_keywords = [
-                'iPhone', 'iPad', 'Mac', 'Apple Watch', 'AirPods',  # Apple
-                'Windows', 'Office', 'Azure', 'Xbox', 'Teams',      # Microsoft
-                'Android', 'Chrome', 'Gmail', 'YouTube', 'Search',  # Google
-                'Model S', 'Model 3', 'Model X', 'Model Y', 'Cybertruck',  # Tesla
-                'GPU', 'GeForce', 'Quadro', 'Tesla', 'Jetson',     # NVIDIA
-                'Facebook', 'Instagram', 'WhatsApp', 'Quest VR'  #Meta
+    Returns:
+        Dict of ticker -> flat get_company_info list (see
+        company_info_extractor.get_company_key_info_many for structured dicts)
+    """
+    results = {ticker: _read_daily_result(_daily_key(ticker)) for ticker in tickers}
+    missing = [ticker for ticker, result in results.items() if result is None]
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        infos = list(executor.map(_fetch_info, missing))
+    
+    for ticker, info in zip(missing, infos):
+        results[ticker] = get_company_info(ticker, info) if info is not None else _unavailable(ticker)
+    return results
 
+def _daily_key(ticker: str) -> str:
+    """
+    Cache key for a ticker's result today
+    """
+    return f"{ticker}:{date.today().isoformat()}"
 
-            ]
-            
-            found_products = []
-            for keyword in product_keywords:
-                if keyword.lower() in summary.lower():
-                    found_products.append(keyword)
-            
-            # If we found specific products, use them
-            if found_products:
-                products = found_products[:5]
-                
-        if not products:
-            products = []
-        
-        # Merge everything into one single list
-        result = [company_name] + executives[:5] + products[:5]
+def _read_daily_result(key: str) -> Optional[List[str]]:
+    """
+    Return today's cached result from memory or the shelve file, or None
+    """
+    with _SHELVE_LOCK:
+        if key not in _DAILY_RESULTS:
+            try:
+                with shelve.open(_SHELVE_PATH) as disk:
+                    if key in disk:
+                        _DAILY_RESULTS[key] = disk[key]
+            except Exception as e:
+                print(f"Could not read company info cache: {e}")
+        if key in _DAILY_RESULTS:
+            return list(_DAILY_RESULTS[key])
+    return None
+
+def _fetch_info(ticker: str) -> Optional[Dict]:
+    """
+    Fetch yfinance info for a ticker, or None if the request fails
+    """
+    try:
+        return yf.Ticker(ticker).info
+    except Exception as e:
+        return None
+
+def _unavailable(ticker: str) -> List[str]:
+    """
+    Placeholder result for a ticker whose info couldn't be fetched (not cached)
+    """
+    return [f"Company {ticker}", "Information not available", "Information not available"]
+
+def _lookup_company_info(ticker: str, info: Dict = None) -> List[str]:
+    """
+    Clean company info from yfinance, fetching it unless already given (uncached)
+    """
+    if info is None:
+        info = yf.Ticker(ticker).info
+    
+    # Company name - clean up "Ltd.", "Inc.", etc.
+    company_name = info.get('longName') or info.get('shortName') or f"Company {ticker}"
+    # Remove common suffixes
+    company_name = _SUFFIX_RE.sub('', company_name)
+    
+    # Extract executives
+    executives = []
+    if 'companyOfficers' in info and info['companyOfficers']:
+        for officer in info['companyOfficers'][:5]:  # Top 5
+            if isinstance(officer, dict):
+                name = officer.get('name', '')
+                if name:
+                    # Remove common prefixes like "Mr.", "Ms.", "Dr.", etc.
+                    name = _PREFIX_RE.sub('', name)
+                    
+                    # Remove middle names/initials - keep only first and last name
+                    name_parts = name.split()
+                    if len(name_parts) >= 2:
+                        # Keep first and last name only
+                        clean_name = f"{name_parts[0]} {name_parts[-1]}"
+                    else:
+                        clean_name = name
+                    
+                    executives.append(clean_name)
+    
+    # Extract products from business summary
+    products = []
+    business_summary = info.get('longBusinessSummary', '')
+    
+    if business_summary:
+        # Clean up the business summary and extract key products
+        summary = _NL_RE.sub(' ', business_summary)
         
-        return result
+        # Look for specific product mentions, reported in keyword order
+        mentioned = {match.group(1).lower() for match in _PRODUCT_RE.finditer(summary)}
+        found_products = [keyword for keyword in PRODUCT_KEYWORDS if keyword.lower() in mentioned]
         
-    except Exception as e:
-        return [f"Company {ticker}", "Information not available", "Information not available"]
+        # If we found specific products, use them
+        if found_products:
+            products = found_products[:5]
+            
+    if not products:
+        products = []
+    
+    # Merge everything into one single list
+    result = [company_name] + executives[:5] + products[:5]
+    
+    return result
 
 # Example usage
 if __name__ == "__main__":
@@ -105,11 +190,12 @@ if __name__ == "__main__":
     print("Company Information Extractor")
     print("=" * 50)
     
+    all_info = get_company_info_many(test_tickers)
     for ticker in test_tickers:
         print(f"\n📊 {ticker}:")
         print("-" * 30)
         
-        info = get_company_info(ticker)
+        info = all_info[ticker]
         
         print(f"All info: {info}")
         print(f"Total items: {len(info)}")
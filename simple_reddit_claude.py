@@ -3,19 +3,114 @@
 Simplified Reddit + Claude integration that definitely works
 """
 
+import asyncio
+import csv
+import hashlib
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import os
+import shelve
+import threading
+import time
 
 # Try to import anthropic, but make it optional
 try:
-    from anthropic import Anthropic
+    from anthropic import Anthropic, AsyncAnthropic
     CLAUDE_AVAILABLE = True
 except ImportError:
     CLAUDE_AVAILABLE = False
     print("⚠️  anthropic not available. Claude features disabled.")
 
+# ijson is optional: with it, comments are parsed as the response streams in
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Connection pool and retry policy for Reddit requests
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+REQUEST_TIMEOUT = 10  # seconds
+RETRY_POLICY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+
+# Reddit's unauthenticated and OAuth budgets; requests are spaced evenly to stay under them
+REQUESTS_PER_MINUTE = 60
+REQUESTS_PER_MINUTE_OAUTH = 100
+
+CSV_BUFFER_SIZE = 1 << 20
+
+CLAUDE_MODEL = "claude-3-sonnet-20240229"
+
+# Input token budget for one analysis, with headroom for the prompt and message framing
+MAX_INPUT_TOKENS = 180_000
+RESERVED_TOKENS = 500
+CHARS_PER_TOKEN = 4  # rough estimate, avoids running a tokenizer per comment
+
+ANALYSIS_PROMPTS = {
+    "sentiment": "Analyze sentiment of these Reddit comments.",
+    "summary": "Summarize the main topics in these comments.",
+    "themes": "Identify main themes in these comments.",
+    "default": "Analyze these comments."
+}
+
+# Analyses run together by analyze_all, and how many may be in flight at once
+ANALYSIS_TYPES = ("sentiment", "summary", "themes")
+MAX_CONCURRENT_ANALYSES = 3
+
+# Anthropic clients shared by all analyzers in the process, one per API key
+_ANTHROPIC_CLIENTS = {}
+_ANTHROPIC_CLIENTS_LOCK = threading.Lock()
+
+def get_anthropic_client(api_key):
+    """Return the shared Anthropic client for an API key, creating it on first use"""
+    with _ANTHROPIC_CLIENTS_LOCK:
+        client = _ANTHROPIC_CLIENTS.get(api_key)
+        if client is None:
+            client = Anthropic(api_key=api_key, max_retries=3, timeout=60.0)
+            _ANTHROPIC_CLIENTS[api_key] = client
+        return client
+
+# Claude responses are cached on disk, keyed by model, analysis type and comment text
+RESPONSE_CACHE_FILE = '.claude_cache'
+RESPONSE_CACHE_TTL = 86400  # seconds
+
+# App-only OAuth: when REDDIT_CLIENT_ID/REDDIT_CLIENT_SECRET are set, threads are fetched
+# from oauth.reddit.com, which has a larger rate limit than the public .json endpoint
+REDDIT_TOKEN_URL = 'https://www.reddit.com/api/v1/access_token'
+REDDIT_OAUTH_HOST = 'https://oauth.reddit.com'
+OAUTH_RETRY_AFTER = 300  # seconds to use the public endpoint after a failed token request
+
+# Reply depth requested from Reddit; deeper replies are trimmed server-side
+COMMENT_DEPTH = 4
+
+# Comment bodies that carry no text
+DELETED_BODIES = frozenset(['[deleted]', '[removed]', ''])
+
+def pack_comments(comments, prompt):
+    """Join unique comments, in order, until the estimated input token budget is used up"""
+    budget = MAX_INPUT_TOKENS - len(prompt) // CHARS_PER_TOKEN - RESERVED_TOKENS
+    packed = []
+    seen = set()
+    used = 0
+    for comment in comments:
+        # Quoted replies often repeat a comment verbatim
+        if comment in seen:
+            continue
+        seen.add(comment)
+        tokens = len(comment) // CHARS_PER_TOKEN + 1  # +1 for the separator
+        if used + tokens > budget:
+            # Truncate an oversized first comment rather than sending no comments
+            if not packed:
+                packed.append(comment[:(budget - 1) * CHARS_PER_TOKEN])
+            break
+        packed.append(comment)
+        used += tokens
+    return "\n\n".join(packed)
+
 class SimpleRedditClaudeAnalyzer:
     """
     Simplified Reddit scraper with optional Claude integration
@@ -26,18 +121,34 @@ class SimpleRedditClaudeAnalyzer:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+        # One pooled session so repeated fetches reuse TCP/TLS connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=RETRY_POLICY)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Shared by batch worker threads to space out requests
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
+        # Bearer token for oauth.reddit.com, fetched on first use
+        self._oauth_lock = threading.Lock()
+        self._oauth_token = None
+        self._oauth_expires_at = 0.0
+        
         # Initialize Claude if available
         self.claude_client = None
+        self.async_claude_client = None
         if CLAUDE_AVAILABLE:
-            if claude_api_key:
-                self.claude_client = Anthropic(api_key=claude_api_key)
-            else:
-                api_key = os.getenv('ANTHROPIC_API_KEY')
-                if api_key:
-                    self.claude_client = Anthropic(api_key=api_key)
-    
-    def get_comments_only(self, thread_url, comment_limit=100):
-        """Extract comments from Reddit thread"""
+            api_key = claude_api_key or os.getenv('ANTHROPIC_API_KEY')
+            if api_key:
+                self.claude_client = get_anthropic_client(api_key)
+                # The async client stays per instance: its connection pool is bound to an event loop
+                self.async_claude_client = AsyncAnthropic(api_key=api_key)
+    
+    def get_comments_only(self, thread_url, comment_limit=100, seen_ids=None):
+        """Extract comments from Reddit thread, skipping comment IDs already in seen_ids"""
         print(f"Getting comments from: {thread_url}")
         
         if not thread_url.endswith('.json'):
@@ -45,72 +156,235 @@ class SimpleRedditClaudeAnalyzer:
         else:
             json_url = thread_url
         
-        params = {'limit': comment_limit} if comment_limit else {}
+        # raw_json=1 returns bodies without HTML-escaping
+        params = {'depth': COMMENT_DEPTH, 'showmore': 'false', 'raw_json': 1}
+        if comment_limit:
+            params['limit'] = comment_limit
         
         try:
-            response = requests.get(json_url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            comments_data = data[1]['data']['children'] if len(data) > 1 else []
-            comments = self.extract_comment_text(comments_data)
+            request_headers = None
+            token = self._get_oauth_token()
+            if token and urlparse(json_url).netloc.endswith('reddit.com'):
+                json_url = REDDIT_OAUTH_HOST + urlparse(json_url).path
+                request_headers = {'Authorization': f'bearer {token}'}
+            
+            self._throttle(oauth=request_headers is not None)
+            with self.session.get(json_url, params=params, headers=request_headers, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                if ijson is not None:
+                    # Yield listing children one at a time off the socket; the post itself
+                    # (first listing, kind t3) is skipped like any other non-comment
+                    response.raw.decode_content = True
+                    comments_data = ijson.items(response.raw, 'item.data.children.item', use_float=True)
+                else:
+                    data = response.json()
+                    comments_data = data[1]['data']['children'] if len(data) > 1 else []
+                comments = self.extract_comment_text(comments_data, comment_limit, seen_ids)
             print(f"Retrieved {len(comments)} comments")
             return comments
         except Exception as e:
             print(f"Error: {e}")
             return []
     
-    def extract_comment_text(self, comments_data):
-        """Extract comment text recursively"""
+    def get_comments_batch(self, urls, comment_limit=100, max_workers=16):
+        """Extract comments from several Reddit threads concurrently, in the order given"""
+        # Shared so a comment crosslinked between threads is only returned once
+        seen_ids = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda url: self.get_comments_only(url, comment_limit, seen_ids), urls))
+    
+    def _get_oauth_token(self):
+        """Return an app-only OAuth token, or None if no Reddit app credentials are configured"""
+        client_id = os.getenv('REDDIT_CLIENT_ID')
+        client_secret = os.getenv('REDDIT_CLIENT_SECRET')
+        if not client_id or not client_secret:
+            return None
+        
+        with self._oauth_lock:
+            # Also covers a recent failure, cached as no token until _oauth_expires_at
+            if time.monotonic() < self._oauth_expires_at:
+                return self._oauth_token
+            try:
+                response = self.session.post(
+                    REDDIT_TOKEN_URL,
+                    auth=(client_id, client_secret),
+                    data={'grant_type': 'client_credentials'},
+                    timeout=REQUEST_TIMEOUT
+                )
+                response.raise_for_status()
+                token = response.json()
+                access_token = token['access_token']
+            except Exception as e:
+                print(f"⚠️  Reddit OAuth failed, using public endpoint: {e}")
+                self._oauth_token = None
+                self._oauth_expires_at = time.monotonic() + OAUTH_RETRY_AFTER
+                return None
+            self._oauth_token = access_token
+            # Refresh a minute early so in-flight requests never carry an expired token
+            self._oauth_expires_at = time.monotonic() + token.get('expires_in', 3600) - 60
+            return self._oauth_token
+    
+    def _throttle(self, oauth=False):
+        """Block until this thread may send its next Reddit request"""
+        interval = 60.0 / (REQUESTS_PER_MINUTE_OAUTH if oauth else REQUESTS_PER_MINUTE)
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + interval
+        if wait > 0:
+            time.sleep(wait)
+    
+    def extract_comment_text(self, comments_data, limit=None, seen_ids=None):
+        """Extract up to limit comment texts with an explicit stack (depth-first, thread order)"""
+        if seen_ids is None:
+            seen_ids = set()
         comment_texts = []
-        for comment_item in comments_data:
+        append = comment_texts.append
+        # One iterator per open level of the reply tree
+        stack = [iter(comments_data)]
+        while stack:
+            comment_item = next(stack[-1], None)
+            if comment_item is None:
+                stack.pop()
+                continue
             if comment_item.get('kind') != 't1':
                 continue
-            comment_data = comment_item.get('data', {})
+            comment_data = comment_item.get('data') or {}
+            # Skip comments (and their replies) already seen, e.g. repeated after pagination
+            comment_id = comment_data.get('id')
+            if comment_id:
+                if comment_id in seen_ids:
+                    continue
+                seen_ids.add(comment_id)
             body = comment_data.get('body', '').strip()
-            if body and body not in ['[deleted]', '[removed]', '']:
-                comment_texts.append(body)
+            if body not in DELETED_BODIES:
+                append(body)
+                # Stop walking the tree once enough comments are collected
+                if limit and len(comment_texts) >= limit:
+                    break
             replies = comment_data.get('replies')
             if replies and isinstance(replies, dict):
-                nested_comments = self.extract_comment_text(replies['data']['children'])
-                comment_texts.extend(nested_comments)
+                stack.append(iter(replies['data']['children']))
         return comment_texts
     
-    def analyze_with_claude(self, comments, analysis_type="sentiment"):
-        """Analyze comments with Claude (if available)"""
+    def _prepare_analysis(self, comments, analysis_type):
+        """Return the cache key and messages.create arguments for one analysis"""
+        prompt = ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["default"])
+        comments_text = pack_comments(comments, prompt)
+        
+        key = hashlib.sha256(f"{CLAUDE_MODEL}|{analysis_type}|{comments_text}".encode('utf-8')).hexdigest()
+        # Comments come first as a cacheable prefix shared by every analysis type;
+        # the API rejects empty text blocks, so the prefix is left out when there are none
+        content = [{"type": "text", "text": prompt}]
+        if comments_text:
+            content.insert(0, {"type": "text", "text": comments_text, "cache_control": {"type": "ephemeral"}})
+        request = dict(
+            model=CLAUDE_MODEL,
+            max_tokens=1000,
+            messages=[{"role": "user", "content": content}],
+            extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
+        )
+        return key, request
+    
+    def analyze_with_claude(self, comments, analysis_type="sentiment", stream=False):
+        """
+        Analyze comments with Claude (if available)
+        
+        With stream=True, returns an iterator of text chunks as they are generated;
+        closing it early aborts generation.
+        """
         if not self.claude_client:
-            return "Claude not available. Please install anthropic package and set API key."
+            unavailable = "Claude not available. Please install anthropic package and set API key."
+            return iter([unavailable]) if stream else unavailable
         
-        comments_text = "\n\n".join(comments[:50])
-        prompts = {
-            "sentiment": "Analyze sentiment of these Reddit comments.",
-            "summary": "Summarize the main topics in these comments.",
-            "themes": "Identify main themes in these comments."
-        }
-        prompt = prompts.get(analysis_type, "Analyze these comments.")
+        key, request = self._prepare_analysis(comments, analysis_type)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return iter([cached]) if stream else cached
+        if stream:
+            return self._stream_analysis(key, request)
         
         try:
-            message = self.claude_client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1000,
-                messages=[{"role": "user", "content": f"{prompt}\n\n{comments_text}"}]
-            )
-            return message.content[0].text
+            message = self.claude_client.messages.create(**request)
+            analysis = message.content[0].text
         except Exception as e:
             return f"Claude analysis error: {e}"
+        self._cache_set(key, analysis)
+        return analysis
+    
+    def _stream_analysis(self, key, request):
+        """Yield analysis text as Claude generates it, caching it only if read to the end"""
+        parts = []
+        try:
+            with self.claude_client.messages.stream(**request) as message_stream:
+                for text in message_stream.text_stream:
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            yield f"Claude analysis error: {e}"
+            return
+        self._cache_set(key, "".join(parts))
+    
+    async def analyze_all(self, comments):
+        """Run every analysis type on the same comments concurrently"""
+        if not self.async_claude_client:
+            unavailable = "Claude not available. Please install anthropic package and set API key."
+            return {analysis_type: unavailable for analysis_type in ANALYSIS_TYPES}
+        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+        
+        async def analyze_one(analysis_type):
+            key, request = self._prepare_analysis(comments, analysis_type)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+            async with semaphore:
+                try:
+                    message = await self.async_claude_client.messages.create(**request)
+                    analysis = message.content[0].text
+                except Exception as e:
+                    return f"Claude analysis error: {e}"
+            self._cache_set(key, analysis)
+            return analysis
+        
+        results = await asyncio.gather(*(analyze_one(analysis_type) for analysis_type in ANALYSIS_TYPES))
+        return dict(zip(ANALYSIS_TYPES, results))
+    
+    def _cache_get(self, key):
+        """Return a cached analysis that has not expired, or None"""
+        try:
+            with shelve.open(RESPONSE_CACHE_FILE) as cache:
+                entry = cache.get(key)
+        except Exception as e:
+            print(f"⚠️  Could not read analysis cache: {e}")
+            return None
+        if entry and time.time() - entry[0] < RESPONSE_CACHE_TTL:
+            return entry[1]
+        return None
+    
+    def _cache_set(self, key, analysis):
+        """Store an analysis with its timestamp"""
+        try:
+            with shelve.open(RESPONSE_CACHE_FILE) as cache:
+                cache[key] = (time.time(), analysis)
+        except Exception as e:
+            print(f"⚠️  Could not write analysis cache: {e}")
     
     def save_to_csv(self, comments, analysis=None, filename="reddit_analysis.csv"):
-        """Save comments and analysis to CSV"""
+        """Save comments to CSV, and the analysis once to a companion .analysis.txt file"""
         try:
-            if analysis:
-                df = pd.DataFrame({
-                    'comment_text': comments,
-                    'analysis': [analysis] * len(comments)
-                })
-            else:
-                df = pd.DataFrame({'comment_text': comments})
-            
-            df.to_csv(filename, index=False)
+            with open(filename, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(['comment_text'])
+                writer.writerows([comment] for comment in comments)
             print(f"✅ Saved {len(comments)} comments to {filename}")
+            
+            # The analysis covers every comment, so it is stored once rather than per row
+            if analysis:
+                analysis_file = os.path.splitext(filename)[0] + '.analysis.txt'
+                with open(analysis_file, 'w', encoding='utf-8') as f:
+                    f.write(analysis)
+                print(f"✅ Saved analysis to {analysis_file}")
         except Exception as e:
             print(f"❌ Error saving CSV: {e}")
 
@@ -138,9 +412,10 @@ def main():
     # Try Claude analysis if available
     if analyzer.claude_client:
         print("\n🤖 Analyzing with Claude...")
-        analysis = analyzer.analyze_with_claude(comments, "sentiment")
-        print(f"Analysis: {analysis[:200]}...")
-        analyzer.save_to_csv(comments, analysis, "reddit_with_analysis.csv")
+        analyses = asyncio.run(analyzer.analyze_all(comments))
+        for analysis_type, analysis in analyses.items():
+            print(f"{analysis_type.title()} analysis: {analysis[:200]}...")
+        analyzer.save_to_csv(comments, analyses["sentiment"], "reddit_with_analysis.csv")
     else:
         print("\n⚠️  Claude not available. Comments saved without analysis.")
         print("To enable Claude analysis:")
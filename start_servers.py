@@ -2,46 +2,84 @@
 """
 Startup script to run both Flask backend and serve frontend
 """
+import signal
 import subprocess
 import sys
-import os
 import time
-import threading
+import urllib.request
 import webbrowser
 from pathlib import Path
 
+FLASK_PORT = 5002
+FRONTEND_PORT = 3000
+HEALTH_URL = f"http://localhost:{FLASK_PORT}/health"
+STARTUP_TIMEOUT = 10  # seconds to wait for Flask to become healthy
+SHUTDOWN_TIMEOUT = 5  # seconds to wait for each child to exit
+
 def run_flask_server():
-    """Run the Flask server"""
+    """Start the Flask server and return its process"""
     print("🚀 Starting Flask server...")
-    subprocess.run([sys.executable, "flask_server.py"])
+    return subprocess.Popen([sys.executable, "flask_server.py"])
 
 def run_frontend_server():
-    """Run a simple HTTP server for the frontend"""
+    """Start a simple HTTP server for the frontend and return its process"""
     print("🌐 Starting frontend server...")
-    os.chdir("frontend")
-    subprocess.run([sys.executable, "-m", "http.server", "3000"])
+    return subprocess.Popen([sys.executable, "-m", "http.server", str(FRONTEND_PORT)], cwd="frontend")
+
+def wait_for_flask(flask_proc):
+    """Poll the health endpoint until Flask answers, exits, or times out"""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline and flask_proc.poll() is None:
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=0.2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.05)
+    return False
+
+def stop(processes):
+    """Terminate child processes and wait for them to exit"""
+    for proc in processes:
+        if proc.poll() is None:
+            proc.terminate()
+    for proc in processes:
+        try:
+            proc.wait(timeout=SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def handle_sigterm(signum, frame):
+    """Turn SIGTERM into SystemExit so the servers are stopped on the way out"""
+    raise SystemExit(128 + signum)
 
 def main():
+    signal.signal(signal.SIGTERM, handle_sigterm)
     print("🎯 MoodRing Markets - Starting both servers...")
-    print("📊 Flask API server will run on http://localhost:5000")
-    print("🌐 Frontend will be served on http://localhost:3000")
+    print(f"📊 Flask API server will run on http://localhost:{FLASK_PORT}")
+    print(f"🌐 Frontend will be served on http://localhost:{FRONTEND_PORT}")
     print("=" * 50)
-    
-    # Start Flask server in a separate thread
-    flask_thread = threading.Thread(target=run_flask_server, daemon=True)
-    flask_thread.start()
-    
-    # Wait a moment for Flask to start
-    time.sleep(2)
-    
-    # Start frontend server
+
+    processes = []
     try:
-        run_frontend_server()
+        flask_proc = run_flask_server()
+        processes.append(flask_proc)
+
+        # Start the frontend once the API is ready to serve it
+        if not wait_for_flask(flask_proc):
+            print("⚠️  Flask did not report healthy yet; starting frontend anyway")
+
+        processes.append(run_frontend_server())
+
+        # Exit as soon as either server stops
+        while all(proc.poll() is None for proc in processes):
+            time.sleep(0.5)
     except KeyboardInterrupt:
         print("\n👋 Shutting down servers...")
-        sys.exit(0)
+    finally:
+        stop(processes)
 
 if __name__ == "__main__":
     main()
 
-
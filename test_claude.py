@@ -3,12 +3,14 @@
 Simple test script to verify Claude integration works
 """
 
-try:
-    import anthropic
-    print("✅ anthropic module imported successfully")
-except ImportError as e:
-    print(f"❌ Error importing anthropic: {e}")
-    exit(1)
+import importlib.util
+
+# Check availability without importing; only claude_integration is imported, to build an analyzer
+for name in ("anthropic", "claude_integration"):
+    if importlib.util.find_spec(name) is None:
+        print(f"❌ {name} not found")
+        exit(1)
+    print(f"✅ {name} found")
 
 try:
     from claude_integration import RedditClaudeAnalyzer
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Regression test: large batched analyses are split into requests within the output token limit
+"""
+
+import json
+
+import claude_integration
+from claude_integration import RedditClaudeAnalyzer
+
+
+class FakeAnalyzer(RedditClaudeAnalyzer):
+    """Analyzer that records requests instead of calling Claude"""
+
+    def __init__(self):
+        super().__init__(claude_api_key="test-key")
+        self.requests = []
+
+    def _create_message(self, content, max_tokens, model=claude_integration.SONNET_MODEL):
+        self.requests.append(max_tokens)
+        if max_tokens > claude_integration.MAX_OUTPUT_TOKENS:
+            raise ValueError("max_tokens exceeds the model's output limit")
+        blocks = content.count("---BLOCK ")
+        return json.dumps([f"analysis {len(self.requests)}.{i}" for i in range(1, blocks + 1)])
+
+
+def test_large_batch_is_split():
+    analyzer = FakeAnalyzer()
+    comment_lists = [[f"comment in thread {i}"] for i in range(20)]
+
+    analyses = analyzer.analyze_comments_batch(comment_lists)
+
+    assert len(analyses) == 20
+    assert len(analyzer.requests) == 3
+    assert all(max_tokens <= claude_integration.MAX_OUTPUT_TOKENS for max_tokens in analyzer.requests)
+    assert analyses[0] == "analysis 1.1"
+    assert analyses[-1] == "analysis 3.4"
+
+
+if __name__ == "__main__":
+    test_large_batch_is_split()
+    print("✅ Large batches are split within the output token limit")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Regression test: CSV columns whose type changes after the first block must still load
+"""
+
+import csv
+import os
+import tempfile
+
+import flask_server
+
+# Enough rows that the CSV spans several Arrow read blocks (1 MiB by default)
+ROWS_PER_SECTION = 20000
+PADDING = "x" * 40
+
+
+def write_csv(path):
+    """First section: integer scores and empty tickers; second: fractional scores and tickers"""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["tickers", "score", "summary"])
+        for _ in range(ROWS_PER_SECTION):
+            writer.writerow(["", 0, f"nothing to see {PADDING}"])
+        for _ in range(ROWS_PER_SECTION):
+            writer.writerow(['{"AAPL": {"score": 0.5, "explanation": "fine"}}', 0.5, f"apple looks fine {PADDING}"])
+
+
+def test_type_change_after_first_block():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "sentiment.csv")
+        write_csv(csv_path)
+        assert os.path.getsize(csv_path) > 2 * 1024 * 1024
+
+        mentions = flask_server.read_mentions_csv(csv_path)
+
+    assert len(mentions) == ROWS_PER_SECTION
+    assert set(mentions["symbol"]) == {"AAPL"}
+    assert (mentions["score"] == 0.5).all()
+
+
+if __name__ == "__main__":
+    test_type_change_after_first_block()
+    print("✅ CSV with a type change past the first block loads correctly")
@@ -3,6 +3,7 @@
 Test script to verify Python interpreter and packages
 """
 
+import importlib.util
 import sys
 import os
 
@@ -14,24 +15,12 @@ print(f"Python path: {sys.path[0]}")
 
 print("\nTesting package imports...")
 
-# Test basic packages
-try:
-    import requests
-    print("✅ requests - OK")
-except ImportError as e:
-    print(f"❌ requests - FAILED: {e}")
-
-try:
-    import pandas
-    print("✅ pandas - OK")
-except ImportError as e:
-    print(f"❌ pandas - FAILED: {e}")
-
-try:
-    import anthropic
-    print("✅ anthropic - OK")
-except ImportError as e:
-    print(f"❌ anthropic - FAILED: {e}")
+# Check availability without importing (pandas alone takes hundreds of ms to load)
+for name in ("requests", "pandas", "anthropic"):
+    if importlib.util.find_spec(name) is not None:
+        print(f"✅ {name} - OK")
+    else:
+        print(f"❌ {name} - FAILED: not installed")
 
 print(f"\nCurrent working directory: {os.getcwd()}")
 print("✅ Test complete!")